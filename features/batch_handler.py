@@ -0,0 +1,160 @@
+import time
+import threading
+from collections import deque
+from llm_handler import LLMHandler, InferenceCancelled
+
+
+class BatchHandler:
+    """
+    Collects prompts from all monitor threads and hands them to the target
+    LLMHandler as one batch. A batch closes when max_batch requests for the
+    same model are pending or max_wait_ms has passed since the first one
+    arrived. Callers block in submit() until their own result is ready.
+
+    Requests name a model key; `resolve(key)` turns it into an instance only
+    once the batch holds the lock, so a pool cannot evict and close it while
+    it waits in the queue.
+    """
+
+    def __init__(self, resolve, lock=None, max_batch=4, max_wait_ms=20):
+        self.resolve = resolve
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self._lock = lock or threading.Lock()  # held while a batch runs on a model instance
+        self._cond = threading.Condition()
+        self._queue = deque()
+        self._worker = None
+        self._stop = threading.Event()  # stop flag of the current worker
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_worker(self):
+        if self._worker is None or not self._worker.is_alive() or self._stop.is_set():
+            self._stop = threading.Event()
+            self._worker = threading.Thread(target=self._run, args=(self._stop,), name="BatchHandler", daemon=True)
+            self._worker.start()
+
+    def stop(self, timeout=5):
+        """
+        Stop the worker: queued requests fail with InferenceCancelled and the
+        running batch is waited for up to `timeout` seconds. The next
+        submit() starts a new worker.
+        """
+        with self._cond:
+            self._stop.set()
+            worker, self._worker = self._worker, None
+            while self._queue:
+                req = self._queue.popleft()
+                req["error"] = InferenceCancelled("batch worker stopped")
+                req["done"].set()
+            self._cond.notify_all()
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout=timeout)
+
+    def submit(self, model_key, prompt, model_params=None, max_tokens=64, prefix=None, prefix_source=None, grammar=None,
+               deadline=None, cancel_event=None):
+        req = {
+            "model": model_key,
+            "args": (prompt, model_params, max_tokens),
+            "prefix": prefix,
+            "prefix_source": prefix_source,
+            "grammar": grammar,
+            "deadline": deadline,
+            "cancel_event": cancel_event,
+            "done": threading.Event(),
+            "result": None,
+            "error": None,
+        }
+        with self._cond:
+            self._ensure_worker()
+            self._queue.append(req)
+            self._cond.notify()
+        while not req["done"].wait(0.1):
+            if cancel_event is not None and cancel_event.is_set():
+                with self._cond:
+                    if req in self._queue:
+                        # Still queued: leave now; a running request aborts between tokens
+                        self._queue.remove(req)
+                        raise InferenceCancelled("generation cancelled")
+        if req["error"] is not None:
+            raise req["error"]
+        return req["result"]
+
+    def _collect(self, stop):
+        with self._cond:
+            while not self._queue and not stop.is_set():
+                self._cond.wait()
+            if stop.is_set():
+                return None, []  # the queue belongs to the next worker now
+            model_key = self._queue[0]["model"]
+            close_at = time.time() + self.max_wait_ms / 1000.0
+            while True:
+                if stop.is_set():
+                    return None, []
+                same = [r for r in self._queue if r["model"] == model_key]
+                remaining = close_at - time.time()
+                if len(same) >= self.max_batch or remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch = same[:self.max_batch]
+            for r in batch:
+                self._queue.remove(r)
+            return model_key, batch
+
+    def _run(self, stop):
+        while not stop.is_set():
+            model_key, batch = self._collect(stop)
+            if not batch:
+                continue
+            live = []
+            for r in batch:
+                try:
+                    LLMHandler.check_abort(r["deadline"], r["cancel_event"])
+                    live.append(r)
+                except Exception as e:
+                    r["error"] = e
+            try:
+                with self._lock:
+                    llm = self.resolve(model_key) if live else None
+                    if len(live) == 1:
+                        r = live[0]
+                        results = [llm.infer(*r["args"], prefix=r["prefix"], prefix_source=r["prefix_source"],
+                                             grammar=r["grammar"], deadline=r["deadline"],
+                                             cancel_event=r["cancel_event"])]
+                    elif live:
+                        results = llm.infer_batch([
+                            r["args"] + (r["grammar"], r["deadline"], r["cancel_event"], r["prefix"], r["prefix_source"])
+                            for r in live
+                        ])
+                    else:
+                        results = []
+                for r, res in zip(live, results):
+                    if isinstance(res, Exception):
+                        r["error"] = res
+                    else:
+                        r["result"] = res
+            except Exception as e:
+                for r in live:
+                    r["error"] = e
+            finally:
+                self.batches += 1
+                self.requests += len(batch)
+                if len(batch) > 1:
+                    print(f"[batch] {len(batch)}/{self.max_batch} requests, "
+                          f"avg occupancy {self.occupancy():.0%}")
+                for r in batch:
+                    r["done"].set()
+
+    def occupancy(self):
+        if not self.batches:
+            return 0.0
+        return self.requests / (self.batches * self.max_batch)
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0,
+            "occupancy": round(self.occupancy(), 3),
+            "pending": len(self._queue),
+        }
@@ -0,0 +1,127 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from configs_handler import ConfigsHandler
+
+
+class CheckpointHandler:
+    """
+    Per-service read positions in a SQLite database (WAL mode). Updates land
+    in memory and are written in one transaction every `flush_ms`, or sooner
+    once `flush_records` updates are pending, so a crash loses at most that
+    window: those records are re-read on restart, never skipped.
+    The first run imports the old positions.json.
+    """
+
+    def __init__(self, conf_dir="../conf", file_name="checkpoints.db", legacy_file="positions.json",
+                 flush_ms=1000, flush_records=100):
+        self.db_path = os.path.join(conf_dir, file_name)
+        self.flush_ms = flush_ms
+        self.flush_records = flush_records
+        self._lock = threading.Lock()  # _states / _pending
+        self._db_lock = threading.Lock()  # the connection
+        self._states = {}  # key -> state dict, including unflushed updates
+        self._pending = {}  # key -> state dict, or None for a delete
+        self._updates = 0  # updates since the last flush
+        os.makedirs(conf_dir, exist_ok=True)
+        self._db = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent; fsync only at checkpoints
+        self._db.execute("CREATE TABLE IF NOT EXISTS checkpoints (key TEXT PRIMARY KEY, state TEXT NOT NULL, updated REAL)")
+        for key, state in self._db.execute("SELECT key, state FROM checkpoints"):
+            self._states[key] = json.loads(state)
+        if not self._states:
+            self._import_legacy(conf_dir, legacy_file)
+        self._wake = threading.Event()
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="CheckpointFlush", daemon=True)
+        self._thread.start()
+
+    def _import_legacy(self, conf_dir, legacy_file):
+        if not os.path.isfile(os.path.join(conf_dir, legacy_file)):
+            return
+        try:
+            legacy = ConfigsHandler(conf_dir=conf_dir, file_name=legacy_file).get_saved_paths() or {}
+        except Exception as e:
+            print(f"[checkpoints] could not import {legacy_file}: {e}")
+            return
+        for key, state in legacy.items():
+            if isinstance(state, dict):
+                self._states[key] = state
+                self._pending[key] = state
+        if self._pending:
+            print(f"[checkpoints] imported {len(self._pending)} positions from {legacy_file}")
+            self.flush()
+
+    # ---------- access ----------
+    def get(self, key, default=None):
+        with self._lock:
+            state = self._states.get(key)
+        return dict(state) if state is not None else default
+
+    def set(self, key, state):
+        with self._lock:
+            self._states[key] = dict(state)
+            self._pending[key] = self._states[key]
+            self._updates += 1
+            due = self._updates >= self.flush_records
+        if due:
+            self._wake.set()
+
+    def delete(self, key):
+        """Forget a checkpoint; written immediately so a restart can't resurrect it."""
+        with self._lock:
+            if self._states.pop(key, None) is None and key not in self._pending:
+                return False
+            self._pending[key] = None
+        self.flush()
+        return True
+
+    def keys(self):
+        with self._lock:
+            return list(self._states)
+
+    # ---------- persistence ----------
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._updates = 0
+        if not pending:
+            return
+        now = time.time()
+        with self._db_lock:
+            try:
+                self._db.execute("BEGIN")
+                for key, state in pending.items():
+                    if state is None:
+                        self._db.execute("DELETE FROM checkpoints WHERE key = ?", (key,))
+                    else:
+                        self._db.execute("INSERT OR REPLACE INTO checkpoints (key, state, updated) VALUES (?, ?, ?)",
+                                         (key, json.dumps(state), now))
+                self._db.execute("COMMIT")
+            except Exception as e:
+                if self._db.in_transaction:
+                    self._db.execute("ROLLBACK")
+                with self._lock:
+                    # Keep newer updates that arrived meanwhile; retry on the next flush
+                    for key, state in pending.items():
+                        self._pending.setdefault(key, state)
+                print(f"[checkpoints] flush failed: {e}")
+
+    def _run(self):
+        while not self._closing.is_set():
+            self._wake.wait(self.flush_ms / 1000.0)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._closing.set()
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        self.flush()
+        with self._db_lock:
+            self._db.close()
@@ -1,48 +1,139 @@
-import os
-import json
-
-class ConfigsHandler:
-    def __init__(self, conf_dir="../conf", file_name="saved_paths.txt"):
-        self.conf_dir = conf_dir
-        self.file_path = os.path.join(self.conf_dir, file_name)
-        self.file_name = file_name
-        self._ensure_file_exists()
-
-    def _ensure_file_exists(self):
-        os.makedirs(self.conf_dir, exist_ok=True)
-        if not os.path.isfile(self.file_path):
-            with open(self.file_path, "w") as f:
-                if self.file_name == "mapping.txt" or self.file_name.endswith(".json"):
-                    json.dump({}, f)
-                else:
-                    pass  # empty file for line-based
-
-    def get_saved_paths(self):
-        if self.file_name == "mapping.txt" or self.file_name.endswith(".json"):
-            with open(self.file_path, "r") as f:
-                return json.load(f)
-        with open(self.file_path, "r") as f:
-            return [line.strip() for line in f if line.strip()]
-
-    def save_path(self, path):
-        if self.file_name == "mapping.txt":
-            raise Exception("Use save_mapping() for mapping.txt")
-        existing = self.get_saved_paths()
-        if path not in existing:
-            with open(self.file_path, "a") as f:
-                f.write(path + "\n")
-
-    def remove_path(self, path):
-        if self.file_name == "mapping.txt":
-            raise Exception("Use save_mapping() for mapping.txt")
-        existing = self.get_saved_paths()
-        if path in existing:
-            updated = [p for p in existing if p != path]
-            with open(self.file_path, "w") as f:
-                f.write("\n".join(updated) + "\n")
-
-    def save_mapping(self, mapping):
-        if self.file_name != "mapping.txt" and not self.file_name.endswith(".json"):
-            raise Exception("save_mapping is for mapping.txt or .json files only")
-        with open(self.file_path, "w") as f:
-            json.dump(mapping, f, indent=2)
+import os
+import copy
+import json
+import time
+import tempfile
+import threading
+
+class ConfigsHandler:
+    """
+    JSON / line-based files under conf/. Parsed contents are cached for the
+    whole process and reused until the file's mtime, size or inode changes
+    or a write goes through this class; callers always get their own copy.
+    Writes go to a temp file that replaces the original, so readers never
+    see half-written JSON. subscribe() registers a callback that gets the
+    new contents whenever a change is written or noticed on read.
+    """
+
+    _cache = {}  # abs file path -> (stat signature, parsed contents)
+    _subscribers = {}  # abs file path -> [callback]
+    _lock = threading.RLock()
+
+    def __init__(self, conf_dir="../conf", file_name="saved_paths.txt"):
+        self.conf_dir = conf_dir
+        self.file_path = os.path.join(self.conf_dir, file_name)
+        self.file_name = file_name
+        self._ensure_file_exists()
+
+    def _is_json(self):
+        return self.file_name == "mapping.txt" or self.file_name.endswith(".json")
+
+    def _ensure_file_exists(self):
+        os.makedirs(self.conf_dir, exist_ok=True)
+        if not os.path.isfile(self.file_path):
+            if self._is_json():
+                self._write(json.dumps({}), {})
+            else:
+                self._write("", [])  # empty file for line-based
+
+    # ---------- cache ----------
+    def _cache_key(self):
+        return os.path.abspath(self.file_path)
+
+    def _signature(self):
+        try:
+            st = os.stat(self.file_path)
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def _read(self):
+        with open(self.file_path, "r") as f:
+            if self._is_json():
+                return json.load(f)
+            return [line.strip() for line in f if line.strip()]
+
+    def _store(self, sig, data, notify):
+        key = self._cache_key()
+        with self._lock:
+            self._cache[key] = (sig, data)
+            callbacks = list(self._subscribers.get(key, ()))
+        if notify:
+            for callback in callbacks:
+                try:
+                    callback(copy.deepcopy(data))
+                except Exception as e:
+                    print(f"[config] {self.file_name} subscriber failed: {e}")
+
+    def get_saved_paths(self):
+        sig = self._signature()
+        with self._lock:
+            cached = self._cache.get(self._cache_key())
+        if cached is not None and sig is not None and cached[0] == sig:
+            return copy.deepcopy(cached[1])
+        data = self._read()
+        # Edited outside this process (or first read): subscribers hear about the former
+        self._store(sig, data, notify=cached is not None)
+        return copy.deepcopy(data)
+
+    def invalidate(self):
+        """Drop the cached contents so the next read goes to disk."""
+        with self._lock:
+            self._cache.pop(self._cache_key(), None)
+
+    def subscribe(self, callback):
+        """Call callback(contents) whenever this file changes."""
+        with self._lock:
+            self._subscribers.setdefault(self._cache_key(), []).append(callback)
+        return callback
+
+    def unsubscribe(self, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(self._cache_key(), [])
+            if callback in callbacks:
+                callbacks.remove(callback)
+
+    # ---------- writes ----------
+    def _write(self, text, data):
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        fd, tmp = tempfile.mkstemp(dir=directory, prefix=f".{self.file_name}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                f.write(text)
+            if os.path.exists(self.file_path):
+                os.chmod(tmp, os.stat(self.file_path).st_mode)
+            for attempt in range(5):
+                try:
+                    os.replace(tmp, self.file_path)
+                    break
+                except PermissionError:
+                    # Windows refuses while another handle has the file open
+                    if attempt == 4:
+                        raise
+                    time.sleep(0.05)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            raise
+        self._store(self._signature(), copy.deepcopy(data), notify=True)
+
+    def save_path(self, path):
+        if self.file_name == "mapping.txt":
+            raise Exception("Use save_mapping() for mapping.txt")
+        existing = self.get_saved_paths()
+        if path not in existing:
+            updated = existing + [path]
+            self._write("\n".join(updated) + "\n", updated)
+
+    def remove_path(self, path):
+        if self.file_name == "mapping.txt":
+            raise Exception("Use save_mapping() for mapping.txt")
+        existing = self.get_saved_paths()
+        if path in existing:
+            updated = [p for p in existing if p != path]
+            self._write("\n".join(updated) + "\n", updated)
+
+    def save_mapping(self, mapping):
+        if not self._is_json():
+            raise Exception("save_mapping is for mapping.txt or .json files only")
+        self._write(json.dumps(mapping, indent=2), mapping)
@@ -0,0 +1,93 @@
+import time
+import datetime
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from evtx_tail_handler import EvtxTailHandler
+
+def _decode_chunk(file_path, offset, after_id):
+    """Backfill worker: render the records numbered above after_id of the chunk at `offset` only."""
+    tail = EvtxTailHandler(file_path)
+    with tail.open_chunk(offset):
+        return [(rec.record_num(), tail.render(rec)) for rec in tail.chunk_records(offset, after_id)]
+
+
+class EvtxBackfillHandler:
+    """
+    Replays an archived EVTX file. Chunks past the checkpoint are decoded in
+    parallel worker processes, a few ahead of the consumer, and their records
+    are handed back strictly in record-number order. Progress and ETA are
+    printed as records are consumed, so the rate is that of the whole
+    pipeline, not just decoding.
+    """
+
+    REPORT_EVERY = 10  # seconds between progress lines
+
+    def __init__(self, file_path, workers=2):
+        self.file_path = file_path
+        self.workers = max(1, workers)
+        self.total = 0
+        self.done = 0
+        self._started = None
+        self._last_report = 0.0
+
+    def plan(self, after_id):
+        """[(chunk offset, first id, last id)] holding records past after_id, in record order."""
+        tail = EvtxTailHandler(self.file_path)
+        with tail.open():
+            chunks = sorted(
+                ((offset, e["first_id"], e["last_id"]) for offset, e in tail.index.items() if e["last_id"] > after_id),
+                key=lambda c: c[1])
+        self.total = sum(last - max(first - 1, after_id) for _, first, last in chunks)
+        return chunks
+
+    def run(self, after_id, stop_flag):
+        """Yield (record number, xml) for every record past after_id, oldest first."""
+        chunks = iter(self.plan(after_id))
+        self.done = 0
+        self._started = self._last_report = time.time()
+        print(f"[backfill][{self.file_path}] {self.total} records after #{after_id}, {self.workers} workers")
+        pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"))
+        pending = deque()
+        try:
+            while True:
+                # Keep a couple of chunks per worker decoding ahead of the consumer
+                while len(pending) < self.workers * 2:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        break
+                    pending.append(pool.submit(_decode_chunk, self.file_path, chunk[0], after_id))
+                if not pending or stop_flag.is_set():
+                    break
+                for rid, xml_str in pending.popleft().result():
+                    if stop_flag.is_set():
+                        return
+                    yield rid, xml_str
+                    self.done += 1
+                    self._report()
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        if not stop_flag.is_set():
+            self._report(final=True)
+
+    def stats(self):
+        elapsed = time.time() - self._started if self._started else 0.0
+        rate = self.done / elapsed if elapsed > 0 else 0.0
+        left = max(self.total - self.done, 0)
+        return {
+            "total": self.total,
+            "done": self.done,
+            "rate": round(rate, 1),
+            "eta_s": round(left / rate) if rate else None,
+        }
+
+    def _report(self, final=False):
+        now = time.time()
+        if not final and now - self._last_report < self.REPORT_EVERY:
+            return
+        self._last_report = now
+        s = self.stats()
+        pct = s["done"] / s["total"] if s["total"] else 1.0
+        eta = str(datetime.timedelta(seconds=s["eta_s"])) if s["eta_s"] is not None else "?"
+        print(f"[backfill][{self.file_path}] {s['done']}/{s['total']} ({pct:.1%}) "
+              f"{s['rate']} rec/s ETA {'done' if final else eta}")
@@ -0,0 +1,83 @@
+import re
+
+
+class EvtxFieldsHandler:
+    """
+    Fills template keys straight from a parsed EVTX record: System/* element
+    text, a few well-known System attributes, EventData/Data[@Name] and
+    UserData leaves. Names are compared case-insensitively without
+    separators, so `Source_Network_Address` finds `SourceNetworkAddress`.
+    A name that appears twice with different values is left unresolved.
+    Purely numeric System fields come back as int, the way the LLM answers
+    them; everything else stays a string.
+    """
+
+    # key (normalized) -> (System child, attribute)
+    SYSTEM_ATTRS = {
+        "systemtime": ("TimeCreated", "SystemTime"),
+        "timecreated": ("TimeCreated", "SystemTime"),
+        "processid": ("Execution", "ProcessID"),
+        "threadid": ("Execution", "ThreadID"),
+        "provider": ("Provider", "Name"),
+        "providername": ("Provider", "Name"),
+        "userid": ("Security", "UserID"),
+        "activityid": ("Correlation", "ActivityID"),
+    }
+    # System fields (normalized) that always hold a decimal number
+    NUMERIC_SYSTEM = {"eventid", "version", "level", "task", "opcode", "eventrecordid", "processid", "threadid"}
+    AMBIGUOUS = object()
+
+    @staticmethod
+    def _norm(name):
+        return re.sub(r"[^a-z0-9]", "", name.lower())
+
+    @staticmethod
+    def _local(tag):
+        return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+    @classmethod
+    def index(cls, root):
+        """Map normalized field name -> value for one record."""
+        fields = {}
+
+        def put(name, value, system=False):
+            key = cls._norm(name)
+            if system and key in cls.NUMERIC_SYSTEM and value.isdigit():
+                value = int(value)
+            if key in fields and fields[key] != value:
+                fields[key] = cls.AMBIGUOUS
+            else:
+                fields[key] = value
+
+        for section in root:
+            section_name = cls._local(section.tag)
+            if section_name == "System":
+                for el in section:
+                    if len(el) == 0 and el.text is not None:
+                        put(cls._local(el.tag), el.text.strip(), system=True)
+                    for key, (child, attr) in cls.SYSTEM_ATTRS.items():
+                        if cls._local(el.tag) == child and el.get(attr) is not None:
+                            put(key, el.get(attr), system=True)
+            elif section_name == "EventData":
+                for el in section:
+                    name = el.get("Name")
+                    if name:
+                        put(name, (el.text or "").strip())
+            elif section_name == "UserData":
+                for el in section.iter():
+                    if el is not section and len(el) == 0:
+                        put(cls._local(el.tag), (el.text or "").strip())
+        return fields
+
+    @classmethod
+    def resolve(cls, root, keys):
+        """Return ({key: value} for the keys found, [keys left unresolved])."""
+        fields = cls.index(root)
+        found, missing = {}, []
+        for key in keys:
+            value = fields.get(cls._norm(key), cls.AMBIGUOUS)
+            if value is cls.AMBIGUOUS:
+                missing.append(key)
+            else:
+                found[key] = value
+        return found, missing
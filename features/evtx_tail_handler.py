@@ -0,0 +1,201 @@
+import mmap
+import contextlib
+from Evtx.Evtx import Evtx, ChunkHeader
+from Evtx import Nodes as e_nodes
+from Evtx import Views as e_views
+
+
+class EvtxTailHandler:
+    """
+    Incremental reader for one EVTX file. Keeps an index of its chunks
+    (chunk offset -> first/last record number and timestamp) so a pass only
+    walks the chunks holding records past a checkpoint, and only those
+    records are handed out. A chunk is re-indexed when its header changes:
+    the active chunk growing, or a wrapped log reusing it.
+
+    Records are classified from their headers (number, timestamp); render()
+    then builds the XML of the ones kept from a cached, pre-rendered form
+    of their BinXML template, so only the substitution values are decoded
+    per record.
+    """
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.index = {}  # chunk offset -> {"sig", "first_id", "last_id", "first_ts", "last_ts"}
+        self.newest_id = 0
+        self._chunks = {}  # chunk offset -> ChunkHeader, valid inside open()
+        self._templates = {}  # template file offset -> [literal str | substitution index]
+
+    @contextlib.contextmanager
+    def open(self):
+        """Map the file and refresh the chunk index for one pass."""
+        with Evtx(self.file_path) as log:
+            self._refresh(log.get_file_header())
+            try:
+                yield self
+            finally:
+                self._chunks = {}
+
+    @contextlib.contextmanager
+    def open_chunk(self, offset):
+        """
+        Map the file and expose only the chunk at `offset`, for a worker that
+        was handed its offset: no index refresh, and the render cache holds
+        just this chunk's templates.
+        """
+        with open(self.file_path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            chunk = ChunkHeader(buf, offset)
+            self._chunks = {offset: chunk} if chunk.check_magic() else {}
+            self._templates = {}  # templates are resident per chunk; nothing carries over
+            try:
+                yield self
+            finally:
+                self._chunks = {}
+                self._templates = {}
+                del chunk  # drop views into the map before it closes
+
+    @staticmethod
+    def naive(ts):
+        """Record headers and rendered SystemTime are both UTC; compare them without tzinfo."""
+        return ts.replace(tzinfo=None) if ts is not None and ts.tzinfo else ts
+
+    def _refresh(self, fh):
+        chunks = {}
+        for chunk in fh.chunks():
+            if not chunk.check_magic():
+                continue
+            offset = chunk.offset()
+            sig = (chunk.log_first_record_number(), chunk.log_last_record_number(), chunk.next_record_offset())
+            entry = self.index.get(offset)
+            if entry is None or entry["sig"] != sig:
+                if entry is not None and entry["sig"][0] != sig[0]:
+                    self._drop_templates(offset)  # chunk reused by a wrapped log
+                entry = self._index_chunk(chunk, sig)
+                if entry is None:
+                    self.index.pop(offset, None)
+                    continue
+                self.index[offset] = entry
+            chunks[offset] = chunk
+        for offset in set(self.index) - set(chunks):
+            del self.index[offset]
+            self._drop_templates(offset)
+        self._chunks = chunks
+        self.newest_id = max((e["last_id"] for e in self.index.values()), default=0)
+
+    @staticmethod
+    def _records(chunk):
+        """The chunk's records, stopping at a torn one at the end of the active chunk."""
+        records = chunk.records()
+        while True:
+            try:
+                rec = next(records)
+                rec.record_num()
+            except Exception:  # StopIteration included
+                return
+            yield rec
+
+    def _index_chunk(self, chunk, sig):
+        first = last = None
+        for rec in self._records(chunk):
+            first = first or rec
+            last = rec
+        if first is None:
+            return None
+        return {"sig": sig, "first_id": first.record_num(), "last_id": last.record_num(),
+                "first_ts": self.naive(first.timestamp()), "last_ts": self.naive(last.timestamp())}
+
+    def records_after(self, after_id, limit, after_ts=None):
+        """
+        Records numbered above after_id (and, when given, in chunks reaching
+        past after_ts), oldest first, at most the newest `limit` of them.
+        Only valid inside open().
+        """
+        after_ts = self.naive(after_ts)
+        picked = sorted(
+            (e["first_id"], offset) for offset, e in self.index.items()
+            if e["last_id"] > after_id and (after_ts is None or e["last_ts"] >= after_ts))
+        out = []
+        for _, offset in reversed(picked):
+            out = self.chunk_records(offset, after_id) + out
+            if len(out) >= limit:
+                break
+        out.sort(key=lambda rec: rec.record_num())
+        return out[-limit:] if limit else out
+
+    def chunk_records(self, offset, after_id=0):
+        """Records of one indexed chunk numbered above after_id. Only valid inside open()."""
+        chunk = self._chunks.get(offset)
+        if chunk is None:
+            return []
+        return [rec for rec in self._records(chunk) if rec.record_num() > after_id]
+
+    # ---------- rendering ----------
+    def _drop_templates(self, chunk_offset):
+        for offset in [o for o in self._templates if chunk_offset <= o < chunk_offset + 0x10000]:
+            del self._templates[offset]
+
+    @staticmethod
+    def _compile(template):
+        """Pre-render a template the way Evtx.Views does, leaving substitution indexes as slots."""
+        parts = []
+
+        def rec(node):
+            if isinstance(node, e_nodes.OpenStartElementNode):
+                parts.append("<" + node.tag_name())
+                for child in node.children():
+                    if isinstance(child, e_nodes.AttributeNode):
+                        parts.append(" " + e_views.validate_name(child.attribute_name().string()) + '="')
+                        rec(child.attribute_value())
+                        parts.append('"')
+                parts.append(">")
+                for child in node.children():
+                    rec(child)
+                parts.append("</" + e_views.validate_name(node.tag_name()) + ">\n")
+            elif isinstance(node, e_nodes.ValueNode):
+                parts.append(e_views.escape_value(node.children()[0].string()))
+            elif isinstance(node, e_nodes.CDataSectionNode):
+                parts.append("<![CDATA[" + e_views.escape_value(node.cdata()) + "]]>")
+            elif isinstance(node, e_nodes.EntityReferenceNode):
+                parts.append(e_views.escape_value(node.entity_reference()))
+            elif isinstance(node, e_nodes.ProcessingInstructionTargetNode):
+                parts.append(e_views.escape_value(node.processing_instruction_target()))
+            elif isinstance(node, e_nodes.ProcessingInstructionDataNode):
+                parts.append(e_views.escape_value(node.string()))
+            elif isinstance(node, e_nodes.TemplateInstanceNode):
+                raise e_views.UnexpectedElementException("TemplateInstanceNode")
+            elif isinstance(node, (e_nodes.NormalSubstitutionNode, e_nodes.ConditionalSubstitutionNode)):
+                parts.append(node.index())
+
+        for child in template.children():
+            rec(child)
+        # Join neighbouring literals so rendering is one pass over few parts
+        merged = []
+        for part in parts:
+            if isinstance(part, str) and merged and isinstance(merged[-1], str):
+                merged[-1] += part
+            else:
+                merged.append(part)
+        return merged
+
+    def _render_root(self, root):
+        template = root.template()
+        parts = self._templates.get(template.offset())
+        if parts is None:
+            parts = self._templates[template.offset()] = self._compile(template)
+        subs = root.substitutions()
+        out = []
+        for part in parts:
+            if isinstance(part, str):
+                out.append(part)
+            elif isinstance(subs[part], e_nodes.BXmlTypeNode):
+                out.append(self._render_root(subs[part].root()))
+            else:
+                out.append(e_views.escape_value(subs[part].string()))
+        return "".join(out)
+
+    def render(self, rec):
+        """Same XML as rec.xml(). Only valid inside open()."""
+        try:
+            return self._render_root(rec.root())
+        except Exception:
+            return rec.xml()
@@ -0,0 +1,269 @@
+import re
+import json
+import threading
+
+
+class DrainMiner:
+    """
+    Drain-style online log template miner. Lines are tokenized, routed by
+    token count and their first tokens through a fixed-depth tree, and
+    joined to the most similar cluster in the leaf; positions where the
+    members differ become "<*>".
+    """
+
+    WILDCARD = "<*>"
+    TOKEN_RE = re.compile(r"[\w.\-:/@]+|[^\w\s]")
+
+    def __init__(self, depth=4, sim_threshold=0.5, max_children=100):
+        self.depth = max(depth, 3)
+        self.sim_threshold = sim_threshold
+        self.max_children = max_children
+        self.root = {}
+        self.clusters = []  # cluster id -> template token list
+
+    @classmethod
+    def tokenize(cls, line):
+        """Return [(token, start, end)] for a line."""
+        return [(m.group(0), m.start(), m.end()) for m in cls.TOKEN_RE.finditer(line)]
+
+    def _leaf(self, tokens):
+        node = self.root.setdefault(len(tokens), {})
+        for tok in tokens[:self.depth - 2]:
+            key = self.WILDCARD if any(c.isdigit() for c in tok) else tok
+            if key not in node and len(node) >= self.max_children:
+                key = self.WILDCARD
+            node = node.setdefault(key, {})
+        return node.setdefault(None, [])  # cluster ids live under the None key
+
+    def add(self, tokens):
+        """Place a token list into a cluster; returns the cluster id."""
+        leaf = self._leaf(tokens)
+        best, best_sim = None, -1.0
+        for cid in leaf:
+            template = self.clusters[cid]
+            same = sum(1 for a, b in zip(template, tokens) if a == b and a != self.WILDCARD)
+            sim = same / len(tokens) if tokens else 1.0
+            if sim > best_sim:
+                best, best_sim = cid, sim
+        if best is not None and best_sim >= self.sim_threshold:
+            template = self.clusters[best]
+            for i, (a, b) in enumerate(zip(template, tokens)):
+                if a != b:
+                    template[i] = self.WILDCARD
+            return best
+        self.clusters.append(list(tokens))
+        leaf.append(len(self.clusters) - 1)
+        return len(self.clusters) - 1
+
+    def find(self, tokens):
+        """Cluster id whose template fits the tokens as-is, without learning; None if none does."""
+        node = self.root.get(len(tokens))
+        for tok in tokens[:self.depth - 2]:
+            if node is None:
+                return None
+            key = self.WILDCARD if any(c.isdigit() for c in tok) else tok
+            node = node.get(key, node.get(self.WILDCARD))
+        if node is None:
+            return None
+        for cid in node.get(None, []):
+            if self.matches(cid, tokens):
+                return cid
+        return None
+
+    def matches(self, cid, tokens):
+        """True when the tokens fit the cluster template without changing it."""
+        template = self.clusters[cid]
+        return len(template) == len(tokens) and all(
+            a == self.WILDCARD or a == b for a, b in zip(template, tokens))
+
+
+class ExtractorHandler:
+    """
+    Learns deterministic extractors from LLM results. Lines are clustered
+    per template with DrainMiner; for each cluster, every JSON field the
+    LLM returned is located as a token span of the line (or recorded as a
+    constant). Once `min_samples` results agree on the same spans, the
+    cluster's extractor is compiled and later lines of that shape are
+    parsed by offsets without the model. Every `verify_every`-th bypass is
+    still sent to the LLM and a mismatch drops the extractor.
+    """
+
+    def __init__(self, min_samples=3, verify_every=50):
+        self.min_samples = min_samples
+        self.verify_every = verify_every
+        self._lock = threading.Lock()
+        self._miners = {}  # scope -> DrainMiner
+        self._extractors = {}  # scope -> {cluster id: learning / compiled state}
+        self._stats = {}  # template name -> {"lines": n, "bypassed": n}
+
+    # ---------- field alignment ----------
+    @staticmethod
+    def _value_kind(value):
+        if value is None:
+            return "null"
+        if isinstance(value, bool):
+            return "bool"
+        if isinstance(value, int):
+            return "int"
+        if isinstance(value, float):
+            return "float"
+        if isinstance(value, str):
+            return "str"
+        return None  # nested objects/lists are not learned
+
+    @staticmethod
+    def _spans(line, tokens, text):
+        """All token spans (i, j) whose text in the line equals `text`."""
+        spans = set()
+        if not text:
+            return spans
+        for i, (_, start, _) in enumerate(tokens):
+            if not line.startswith(text, start):
+                continue
+            end = start + len(text)
+            for j in range(i, len(tokens)):
+                if tokens[j][2] == end:
+                    spans.add((i, j + 1))
+                    break
+                if tokens[j][2] > end:
+                    break
+        return spans
+
+    def _align(self, line, tokens, result):
+        """Return {field: (kind, candidate specs)}, or None when a value is a nested object or list."""
+        fields = {}
+        for field, value in result.items():
+            kind = self._value_kind(value)
+            if kind is None:
+                return None
+            specs = {("const", json.dumps(value))}
+            if kind in ("int", "float", "str"):
+                # null / true / false are only learned as constants
+                text = value if kind == "str" else json.dumps(value)
+                specs |= {("span",) + s for s in self._spans(line, tokens, text.strip())}
+            fields[field] = (kind, specs)
+        return fields
+
+    # ---------- learning ----------
+    def _cluster(self, scope, line):
+        miner = self._miners.setdefault(scope, DrainMiner())
+        tokens = miner.tokenize(line)
+        return miner, tokens
+
+    def learn(self, template_name, scope, line, response):
+        """Feed an LLM JSON response for `line` into the cluster's extractor."""
+        try:
+            result = json.loads(response)
+        except ValueError:
+            return
+        if not isinstance(result, dict) or not result:
+            return
+        line = line.strip()
+        with self._lock:
+            miner, tokens = self._cluster(scope, line)
+            cid = miner.add([t for t, _, _ in tokens])
+            signature = tuple(miner.clusters[cid])
+            states = self._extractors.setdefault(scope, {})
+            state = states.get(cid)
+            if state is None or state["signature"] != signature:
+                # New cluster, or its template generalized: learn again from here
+                state = {"signature": signature, "fields": None, "samples": 0, "compiled": None, "since_verify": 0}
+                states[cid] = state
+            aligned = self._align(line, tokens, result)
+            if aligned is None:
+                state["fields"], state["samples"], state["compiled"] = None, -1, None
+                return
+            if state["samples"] < 0:
+                return  # cluster produced unlearnable output before
+            if state["compiled"] is not None:
+                if self._apply(state["compiled"], line, tokens) != result:
+                    print(f"[extractor][{template_name}] cluster {cid} disagreed with the LLM, relearning")
+                    state.update(fields=None, samples=0, compiled=None)
+                return
+            if state["fields"] is None or list(state["fields"]) != list(aligned):
+                state["fields"], state["samples"] = aligned, 1
+            else:
+                merged = {}
+                for field, (kind, specs) in aligned.items():
+                    prev_kind, prev_specs = state["fields"][field]
+                    common = prev_specs & specs
+                    if prev_kind != kind or not common:
+                        merged = None
+                        break
+                    merged[field] = (kind, common)
+                if merged is None:
+                    state["fields"], state["samples"] = aligned, 1
+                else:
+                    state["fields"] = merged
+                    state["samples"] += 1
+            if self.min_samples and state["samples"] >= self.min_samples:
+                state["compiled"] = self._compile(miner.clusters[cid], state["fields"])
+                print(f"[extractor][{template_name}] cluster {cid} compiled "
+                      f"({len(state['fields'])} fields after {state['samples']} samples)")
+
+    @staticmethod
+    def _compile(template, fields):
+        # Prefer spans over constants, and the shortest span among equals
+        compiled = []
+        for field, (kind, specs) in fields.items():
+            spans = sorted((s for s in specs if s[0] == "span"), key=lambda s: (s[2] - s[1], s[1]))
+            spec = spans[0] if spans else next(iter(specs))
+            compiled.append((field, kind, spec))
+        return {"template": list(template), "fields": compiled}
+
+    @staticmethod
+    def _apply(compiled, line, tokens):
+        template = compiled["template"]
+        if len(template) != len(tokens) or any(
+                a != DrainMiner.WILDCARD and a != t for a, (t, _, _) in zip(template, tokens)):
+            return None
+        out = {}
+        for field, kind, spec in compiled["fields"]:
+            if spec[0] == "const":
+                out[field] = json.loads(spec[1])
+                continue
+            text = line[tokens[spec[1]][1]:tokens[spec[2] - 1][2]]
+            try:
+                out[field] = int(text) if kind == "int" else float(text) if kind == "float" else text
+            except ValueError:
+                return None
+        return out
+
+    # ---------- bypass ----------
+    def extract(self, template_name, scope, line):
+        """Return a JSON string for `line` when a compiled extractor covers it, else None."""
+        line = line.strip()
+        with self._lock:
+            stats = self._stats.setdefault(template_name, {"lines": 0, "bypassed": 0})
+            stats["lines"] += 1
+            if stats["lines"] % 100 == 0:
+                print(f"[extractor][{template_name}] bypass rate "
+                      f"{stats['bypassed'] / stats['lines']:.1%} ({stats['bypassed']}/{stats['lines']})")
+            miner = self._miners.get(scope)
+            if miner is None or not self.min_samples:
+                return None
+            tokens = miner.tokenize(line)
+            cid = miner.find([t for t, _, _ in tokens])
+            state = self._extractors.get(scope, {}).get(cid)
+            if state is None or state["compiled"] is None:
+                return None
+            state["since_verify"] += 1
+            if self.verify_every and state["since_verify"] >= self.verify_every:
+                state["since_verify"] = 0
+                return None  # let the LLM answer this one; learn() checks agreement
+            result = self._apply(state["compiled"], line, tokens)
+            if result is None:
+                return None
+            stats["bypassed"] += 1
+            return json.dumps(result)
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for template_name, s in self._stats.items():
+                out[template_name] = {
+                    "lines": s["lines"],
+                    "bypassed": s["bypassed"],
+                    "bypass_rate": round(s["bypassed"] / s["lines"], 3) if s["lines"] else 0.0,
+                }
+            return out
@@ -0,0 +1,175 @@
+import os
+import sys
+import time
+import select
+import struct
+import threading
+import ctypes
+import ctypes.util
+
+
+class FileWatcherHandler:
+    """
+    One watcher thread shared by all monitors. Each monitor subscribes to
+    its file and gets an Event that is set when the file changes, so idle
+    files cost no wakeups. On Linux the parent directories are watched with
+    inotify (catching appends, rewrites, rotation and re-creation); elsewhere,
+    and for paths whose directory can't be watched, the thread stats every
+    subscribed file once per poll interval instead of each monitor
+    re-reading its file.
+    """
+
+    IN_MODIFY = 0x2
+    IN_ATTRIB = 0x4
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    WATCH_MASK = IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    EVENT_HEADER = struct.Struct("iIII")
+
+    SAFETY_INTERVAL = 60  # seconds a monitor sleeps at most when change events are reliable
+
+    def __init__(self, poll_interval=2):
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._subs = {}  # abs path -> set of Events
+        self._dirs = {}  # watched directory -> inotify watch descriptor
+        self._wd_dirs = {}  # watch descriptor -> directory
+        self._polled = {}  # abs path -> last stat signature, for paths without an inotify watch
+        self._thread = None
+        self._closing = threading.Event()
+        self._libc = None
+        self._fd = -1
+        if sys.platform.startswith("linux"):
+            try:
+                self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+                self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            except (OSError, AttributeError):
+                self._fd = -1
+            if self._fd < 0:
+                print("[watcher] inotify unavailable, polling for changes")
+        self.native = self._fd >= 0
+
+    # ---------- subscriptions ----------
+    def subscribe(self, path):
+        """Return an Event set whenever `path` changes."""
+        path = os.path.abspath(path)
+        event = threading.Event()
+        with self._lock:
+            self._subs.setdefault(path, set()).add(event)
+            if not self._add_dir_watch(os.path.dirname(path)):
+                self._polled.setdefault(path, self._signature(path))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="FileWatcher", daemon=True)
+                self._thread.start()
+        return event
+
+    def unsubscribe(self, path, event):
+        path = os.path.abspath(path)
+        with self._lock:
+            subs = self._subs.get(path)
+            if subs is not None:
+                subs.discard(event)
+                if not subs:
+                    self._subs.pop(path, None)
+                    self._polled.pop(path, None)
+            directory = os.path.dirname(path)
+            if directory in self._dirs and not any(os.path.dirname(p) == directory for p in self._subs):
+                wd = self._dirs.pop(directory)
+                self._wd_dirs.pop(wd, None)
+                self._libc.inotify_rm_watch(self._fd, wd)
+
+    def wait(self, event, stop_flag, timeout):
+        """Sleep until the file changes, stop_flag is set or timeout passes; True when stopping."""
+        event.wait(timeout)
+        event.clear()
+        return stop_flag.is_set()
+
+    def close(self):
+        self._closing.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+    # ---------- internals ----------
+    def _add_dir_watch(self, directory):
+        if self._fd < 0:
+            return False
+        if directory in self._dirs:
+            return True
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            return False
+        self._dirs[directory] = wd
+        self._wd_dirs[wd] = directory
+        return True
+
+    @staticmethod
+    def _signature(path):
+        try:
+            st = os.stat(path)
+            return (st.st_ino, st.st_size, st.st_mtime_ns)
+        except OSError:
+            return None
+
+    def _fire(self, path):
+        for event in self._subs.get(path, ()):
+            event.set()
+
+    def _poll(self):
+        with self._lock:
+            for path, old in list(self._polled.items()):
+                sig = self._signature(path)
+                if sig != old:
+                    self._polled[path] = sig
+                    self._fire(path)
+
+    def _read_events(self):
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        with self._lock:
+            while offset + self.EVENT_HEADER.size <= len(data):
+                wd, mask, _, name_len = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + name_len].rstrip(b"\0")
+                offset += name_len
+                if mask & self.IN_Q_OVERFLOW:
+                    for path in self._subs:
+                        self._fire(path)
+                    continue
+                directory = self._wd_dirs.get(wd)
+                if directory is None:
+                    continue
+                if mask & self.IN_IGNORED:
+                    # Directory gone: fall back to polling its files
+                    self._wd_dirs.pop(wd, None)
+                    self._dirs.pop(directory, None)
+                    for path in self._subs:
+                        if os.path.dirname(path) == directory:
+                            self._polled.setdefault(path, None)
+                            self._fire(path)
+                    continue
+                self._fire(os.path.join(directory, os.fsdecode(name)))
+
+    def _run(self):
+        last_poll = 0.0
+        while not self._closing.is_set():
+            if self._fd >= 0:
+                ready, _, _ = select.select([self._fd], [], [], self.poll_interval)
+                if ready:
+                    self._read_events()
+            else:
+                self._closing.wait(self.poll_interval)
+            if time.time() - last_poll >= self.poll_interval:
+                self._poll()
+                last_poll = time.time()
@@ -1,123 +1,232 @@
-import flet as ft
-from configs_handler import ConfigsHandler
-
-def global_config_tab():
-    global_config_handler = ConfigsHandler(file_name="global_config.json")
-    
-    # Load existing config or set defaults
-    config = global_config_handler.get_saved_paths()
-    if not config:
-        config = {
-            "llm_timeout": 60,
-            "max_log_size": 100,
-            "tail_limit": 10,
-            "file_access_rate": 1,
-            "gpu_acceleration": False,
-            "gpu_offload_ratio": 1.0,
-            "dynamic_ctx": True
-        }
-        global_config_handler.save_mapping(config)
-    
-    def save_config():
-        global_config_handler.save_mapping(config)
-    
-    # LLM Timeout field
-    timeout_field = ft.TextField(
-        label="LLM Response Timeout (seconds)",
-        width=200,
-        value=str(config["llm_timeout"]),
-        on_change=lambda e: (config.update({"llm_timeout": int(e.control.value) if e.control.value.isdigit() else 60}), save_config())
-    )
-
-    # Max Log Size field
-    log_size_field = ft.TextField(
-        label="Max Log Size (characters)",
-        width=200,
-        value=str(config["max_log_size"]),
-        on_change=lambda e: (config.update({"max_log_size": int(e.control.value) if e.control.value.isdigit() else 100}), save_config())
-    )
-    
-    # Tail Limit field
-    tail_limit_field = ft.TextField(
-        label="Last N Logs to Match",
-        width=200,
-        value=str(config["tail_limit"]),
-        on_change=lambda e: (config.update({"tail_limit": int(e.control.value) if e.control.value.isdigit() else 10}), save_config())
-    )
-    
-    # File Access Rate field
-    access_rate_field = ft.TextField(
-        label="Log File Access Rate (seconds)",
-        width=200,
-        value=str(config["file_access_rate"]),
-        on_change=lambda e: (config.update({"file_access_rate": int(e.control.value) if e.control.value.isdigit() else 1}), save_config())
-    )
-
-    # GPU Acceleration checkbox
-    gpu_checkbox = ft.Checkbox(
-        label="Enable GPU Acceleration (NVIDIA only)",
-        value=config["gpu_acceleration"],
-        on_change=lambda e: (config.update({"gpu_acceleration": e.control.value}), save_config())
-    )
-    
-    # GPU Offload Ratio slider
-    #gpu_ratio_text = ft.Text(f"{int(config['gpu_offload_ratio'] * 100)}%", size=14)
-    
-    gpu_ratio_container = ft.Container(
-        content=ft.Text(f"{int(config['gpu_offload_ratio'] * 100)}%", size=14),
-        width=50
-    )
-
-    def update_gpu_ratio(e):
-        config["gpu_offload_ratio"] = e.control.value / 100
-        gpu_ratio_container.content.value = f"{int(e.control.value)}%"
-        gpu_ratio_container.update()
-        save_config()
-    
-    gpu_ratio_slider = ft.Slider(
-        min=0,
-        max=100,
-        divisions=10,
-        value=config["gpu_offload_ratio"] * 100,
-        width=300,
-        on_change=update_gpu_ratio
-    )
-    
-    return ft.Container(
-        content=ft.Column([
-            ft.Text("Global Configuration", size=16, weight="bold"),
-            ft.Divider(),
-            
-            # Performance Settings
-            ft.Container(
-                content=ft.Column([
-                    ft.Text("Performance Settings", size=14, weight="bold"),
-                    ft.Container(height=10),  # Add spacing
-                    ft.Row([timeout_field, log_size_field]),
-                    ft.Row([tail_limit_field, access_rate_field])
-                ]),
-                padding=10,
-                border=ft.border.all(1, "grey"),
-                border_radius=10,
-                margin=ft.margin.only(bottom=20)
-            ),
-            
-            # GPU Settings
-            ft.Container(
-                content=ft.Column([
-                    ft.Text("GPU Configuration", size=14, weight="bold"),
-                    ft.Container(height=10),
-                    gpu_checkbox,
-                    ft.Row([
-                        ft.Text("GPU Offload Ratio:", size=12),
-                        gpu_ratio_container
-                    ]),
-                    gpu_ratio_slider
-                ]),
-                padding=10,
-                border=ft.border.all(1, "grey"),
-                border_radius=10
-            )
-        ]),
-        padding=20
+import flet as ft
+from configs_handler import ConfigsHandler
+
+def global_config_tab():
+    global_config_handler = ConfigsHandler(file_name="global_config.json")
+    
+    # Load existing config or set defaults
+    config = global_config_handler.get_saved_paths()
+    if not config:
+        config = {
+            "llm_timeout": 60,
+            "max_log_size": 100,
+            "tail_limit": 10,
+            "file_access_rate": 1,
+            "gpu_acceleration": False,
+            "gpu_offload_ratio": 1.0,
+            "dynamic_ctx": True,
+            "model_pool_ram_mb": 4096,
+            "prefix_cache_disk_mb": 2048,
+            "batch_max_size": 4,
+            "batch_max_wait_ms": 20,
+            "inference_workers": 0,
+            "threads_per_worker": 2,
+            "result_cache_size": 10000,
+            "result_cache_persist": False,
+            "extractor_min_samples": 3,
+            "extractor_verify_every": 50,
+            "backfill_workers": 2,
+            "checkpoint_flush_ms": 1000,
+            "checkpoint_flush_records": 100
+        }
+        global_config_handler.save_mapping(config)
+    
+    def save_config():
+        global_config_handler.save_mapping(config)
+    
+    # LLM Timeout field
+    timeout_field = ft.TextField(
+        label="LLM Response Timeout (seconds)",
+        width=200,
+        value=str(config["llm_timeout"]),
+        on_change=lambda e: (config.update({"llm_timeout": int(e.control.value) if e.control.value.isdigit() else 60}), save_config())
+    )
+
+    # Max Log Size field
+    log_size_field = ft.TextField(
+        label="Max Log Size (characters)",
+        width=200,
+        value=str(config["max_log_size"]),
+        on_change=lambda e: (config.update({"max_log_size": int(e.control.value) if e.control.value.isdigit() else 100}), save_config())
+    )
+    
+    # Tail Limit field
+    tail_limit_field = ft.TextField(
+        label="Last N Logs to Match",
+        width=200,
+        value=str(config["tail_limit"]),
+        on_change=lambda e: (config.update({"tail_limit": int(e.control.value) if e.control.value.isdigit() else 10}), save_config())
+    )
+    
+    # File Access Rate field
+    access_rate_field = ft.TextField(
+        label="Log File Access Rate (seconds)",
+        width=200,
+        value=str(config["file_access_rate"]),
+        on_change=lambda e: (config.update({"file_access_rate": int(e.control.value) if e.control.value.isdigit() else 1}), save_config())
+    )
+
+    # Model pool RAM budget field
+    pool_ram_field = ft.TextField(
+        label="Model Pool RAM Budget (MB)",
+        width=200,
+        value=str(config.get("model_pool_ram_mb", 4096)),
+        on_change=lambda e: (config.update({"model_pool_ram_mb": int(e.control.value) if e.control.value.isdigit() else 4096}), save_config())
+    )
+
+    # Batching knobs
+    batch_size_field = ft.TextField(
+        label="Max Inference Batch Size",
+        width=200,
+        value=str(config.get("batch_max_size", 4)),
+        on_change=lambda e: (config.update({"batch_max_size": int(e.control.value) if e.control.value.isdigit() else 4}), save_config())
+    )
+
+    batch_wait_field = ft.TextField(
+        label="Batch Max Wait (ms)",
+        width=200,
+        value=str(config.get("batch_max_wait_ms", 20)),
+        on_change=lambda e: (config.update({"batch_max_wait_ms": int(e.control.value) if e.control.value.isdigit() else 20}), save_config())
+    )
+
+    # Inference worker processes (0 = run in the UI process)
+    workers_field = ft.TextField(
+        label="Inference Worker Processes",
+        width=200,
+        value=str(config.get("inference_workers", 0)),
+        on_change=lambda e: (config.update({"inference_workers": int(e.control.value) if e.control.value.isdigit() else 0}), save_config())
+    )
+
+    worker_threads_field = ft.TextField(
+        label="Threads per Worker",
+        width=200,
+        value=str(config.get("threads_per_worker", 2)),
+        on_change=lambda e: (config.update({"threads_per_worker": int(e.control.value) if e.control.value.isdigit() else 2}), save_config())
+    )
+
+    # Normalized-line result cache (0 entries = disabled)
+    result_cache_field = ft.TextField(
+        label="Result Cache Entries",
+        width=200,
+        value=str(config.get("result_cache_size", 10000)),
+        on_change=lambda e: (config.update({"result_cache_size": int(e.control.value) if e.control.value.isdigit() else 10000}), save_config())
+    )
+
+    result_cache_persist_checkbox = ft.Checkbox(
+        label="Persist Result Cache",
+        value=config.get("result_cache_persist", False),
+        on_change=lambda e: (config.update({"result_cache_persist": e.control.value}), save_config())
+    )
+
+    # Learned extractors (0 samples = always use the LLM)
+    extractor_samples_field = ft.TextField(
+        label="Extractor Min Samples",
+        width=200,
+        value=str(config.get("extractor_min_samples", 3)),
+        on_change=lambda e: (config.update({"extractor_min_samples": int(e.control.value) if e.control.value.isdigit() else 3}), save_config())
+    )
+
+    extractor_verify_field = ft.TextField(
+        label="Extractor Verify Every N Lines",
+        width=200,
+        value=str(config.get("extractor_verify_every", 50)),
+        on_change=lambda e: (config.update({"extractor_verify_every": int(e.control.value) if e.control.value.isdigit() else 50}), save_config())
+    )
+
+    backfill_workers_field = ft.TextField(
+        label="EVTX Backfill Workers",
+        width=200,
+        value=str(config.get("backfill_workers", 2)),
+        on_change=lambda e: (config.update({"backfill_workers": int(e.control.value) if e.control.value.isdigit() else 2}), save_config())
+    )
+
+    # Checkpoints are written at most this far apart (a crash re-reads that window)
+    checkpoint_ms_field = ft.TextField(
+        label="Checkpoint Flush Interval (ms)",
+        width=200,
+        value=str(config.get("checkpoint_flush_ms", 1000)),
+        on_change=lambda e: (config.update({"checkpoint_flush_ms": int(e.control.value) if e.control.value.isdigit() else 1000}), save_config())
+    )
+
+    checkpoint_records_field = ft.TextField(
+        label="Checkpoint Flush Every N Records",
+        width=200,
+        value=str(config.get("checkpoint_flush_records", 100)),
+        on_change=lambda e: (config.update({"checkpoint_flush_records": int(e.control.value) if e.control.value.isdigit() else 100}), save_config())
+    )
+
+    # GPU Acceleration checkbox
+    gpu_checkbox = ft.Checkbox(
+        label="Enable GPU Acceleration (NVIDIA only)",
+        value=config["gpu_acceleration"],
+        on_change=lambda e: (config.update({"gpu_acceleration": e.control.value}), save_config())
+    )
+    
+    # GPU Offload Ratio slider
+    #gpu_ratio_text = ft.Text(f"{int(config['gpu_offload_ratio'] * 100)}%", size=14)
+    
+    gpu_ratio_container = ft.Container(
+        content=ft.Text(f"{int(config['gpu_offload_ratio'] * 100)}%", size=14),
+        width=50
+    )
+
+    def update_gpu_ratio(e):
+        config["gpu_offload_ratio"] = e.control.value / 100
+        gpu_ratio_container.content.value = f"{int(e.control.value)}%"
+        gpu_ratio_container.update()
+        save_config()
+    
+    gpu_ratio_slider = ft.Slider(
+        min=0,
+        max=100,
+        divisions=10,
+        value=config["gpu_offload_ratio"] * 100,
+        width=300,
+        on_change=update_gpu_ratio
+    )
+    
+    return ft.Container(
+        content=ft.Column([
+            ft.Text("Global Configuration", size=16, weight="bold"),
+            ft.Divider(),
+            
+            # Performance Settings
+            ft.Container(
+                content=ft.Column([
+                    ft.Text("Performance Settings", size=14, weight="bold"),
+                    ft.Container(height=10),  # Add spacing
+                    ft.Row([timeout_field, log_size_field]),
+                    ft.Row([tail_limit_field, access_rate_field]),
+                    ft.Row([pool_ram_field]),
+                    ft.Row([batch_size_field, batch_wait_field]),
+                    ft.Row([workers_field, worker_threads_field]),
+                    ft.Row([result_cache_field, result_cache_persist_checkbox]),
+                    ft.Row([extractor_samples_field, extractor_verify_field]),
+                    ft.Row([backfill_workers_field]),
+                    ft.Row([checkpoint_ms_field, checkpoint_records_field])
+                ]),
+                padding=10,
+                border=ft.border.all(1, "grey"),
+                border_radius=10,
+                margin=ft.margin.only(bottom=20)
+            ),
+            
+            # GPU Settings
+            ft.Container(
+                content=ft.Column([
+                    ft.Text("GPU Configuration", size=14, weight="bold"),
+                    ft.Container(height=10),
+                    gpu_checkbox,
+                    ft.Row([
+                        ft.Text("GPU Offload Ratio:", size=12),
+                        gpu_ratio_container
+                    ]),
+                    gpu_ratio_slider
+                ]),
+                padding=10,
+                border=ft.border.all(1, "grey"),
+                border_radius=10
+            )
+        ]),
+        padding=20
     )
\ No newline at end of file
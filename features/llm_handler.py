@@ -1,83 +1,701 @@
-import os
-import sys
-import time
-import multiprocessing
-from contextlib import contextmanager
-from llama_cpp import Llama
-import json
-
-
-class LLMHandler:
-    def __init__(self, model_name, model_dir="../../models", n_ctx=2048, n_threads=None, n_batch=512, n_gpu_layers=-1):
-        self.model_path = os.path.abspath(os.path.join(model_dir, model_name))
-        self.n_ctx = n_ctx
-        self.n_threads = min(2, multiprocessing.cpu_count())
-        self.n_batch = n_batch
-        self.n_gpu_layers = n_gpu_layers
-        self.model = None
-        self.call_count = 0
-
-
-    @contextmanager
-    def suppress_output(self):
-        with open(os.devnull, 'w') as devnull:
-            old_stdout = sys.stdout
-            old_stderr = sys.stderr
-            sys.stdout = devnull
-            sys.stderr = devnull
-            try:
-                yield
-            finally:
-                sys.stdout = old_stdout
-                sys.stderr = old_stderr
-
-    def load_model(self):
-        with self.suppress_output():
-            self.model = Llama(
-                model_path=self.model_path,
-                n_ctx=self.n_ctx,
-                n_threads=self.n_threads,
-                n_batch=self.n_batch,
-                n_gpu_layers=self.n_gpu_layers,
-                verbose=False,
-                use_mlock=True
-            )
-    
-    def infer(self, prompt, model_params=None, max_tokens=64):
-
-        if self.model is None:
-            self.load_model()
-        
-        # Use model_params if provided, otherwise use defaults
-        if model_params:
-            stop_tokens = model_params.get("stop", ["\n"])
-            temperature = model_params.get("temperature", 0)
-            top_p = model_params.get("top_p", 0.9)
-            max_tokens = model_params.get("max_tokens", max_tokens)
-        else:
-            # Fallback defaults when no model_params provided
-            stop_tokens = ["\n"]
-            temperature = 0
-            top_p = 0.9
-        
-        start = time.time()
-        self.call_count += 1
-        print(f"[LLM] Call #{self.call_count} starting inference with prompt length: {len(prompt)}")
-        output = self.model(
-            prompt, 
-            max_tokens=max_tokens, 
-            stop=stop_tokens, 
-            temperature=temperature,
-            top_p=top_p,
-            echo=False
-        )
-        end = time.time()
-        
-        result = output["choices"][0]["text"].strip()
-        return result, round(end - start, 3)
-
-
-    @staticmethod
-    def list_available_models(model_dir="../../models"):
-        files = os.listdir(os.path.abspath(model_dir))
+import os
+import sys
+import time
+import multiprocessing
+from collections import OrderedDict
+from contextlib import contextmanager
+from llama_cpp import Llama, LlamaGrammar
+import json
+
+
+class InferenceTimeout(Exception):
+    """Generation passed its deadline and was aborted."""
+
+
+class InferenceCancelled(Exception):
+    """Generation was aborted through its cancel event."""
+
+
+class JsonObjectTracker:
+    """
+    Incremental scan of streamed text for the end of the first top-level
+    JSON object. Braces inside strings (and escaped quotes) are skipped.
+    """
+
+    def __init__(self):
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.done = False
+
+    def feed(self, text):
+        """Return the offset just past the closing brace in `text`, or None."""
+        for i, ch in enumerate(text):
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = self.depth > 0
+            elif ch == "{":
+                self.depth += 1
+            elif ch == "}" and self.depth:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.done = True
+                    return i + 1
+        return None
+
+
+class LLMHandler:
+    PREFIX_CACHE_SIZE = 8
+
+    def __init__(self, model_name, model_dir="../../models", n_ctx=2048, n_threads=None, n_batch=512, n_gpu_layers=-1):
+        self.model_path = os.path.abspath(os.path.join(model_dir, model_name))
+        self.n_ctx = n_ctx
+        self.n_threads = n_threads or min(2, multiprocessing.cpu_count())
+        self.n_batch = n_batch
+        self.n_gpu_layers = n_gpu_layers
+        self.model = None
+        self.call_count = 0
+        self._prefix_states = OrderedDict()  # prefix text -> LlamaState after evaluating it
+        self.prefix_disk_cache = None  # optional PrefixCacheHandler
+        self.prefix_hits = 0
+        self.prefix_misses = 0
+        self._batch_ctx = None  # multi-sequence context used by infer_batch
+        self._grammars = {}  # GBNF text -> compiled LlamaGrammar
+        self._batch_ctx_seqs = 0
+        self._batch_prefix = ()  # prompt-prefix tokens held in seq 0 of the batch context
+        self.json_early_stops = 0  # calls cut short once the JSON object closed
+        self.tokens_saved = 0  # unused max_tokens budget of those calls
+        self._drafts = {}  # draft model file -> Llama used for speculative decoding
+        self.spec_drafted = 0  # tokens proposed by prompt lookup / draft model
+        self.spec_accepted = 0  # of those, tokens the target model agreed with
+
+
+    @contextmanager
+    def suppress_output(self):
+        with open(os.devnull, 'w') as devnull:
+            old_stdout = sys.stdout
+            old_stderr = sys.stderr
+            sys.stdout = devnull
+            sys.stderr = devnull
+            try:
+                yield
+            finally:
+                sys.stdout = old_stdout
+                sys.stderr = old_stderr
+
+    def load_model(self):
+        with self.suppress_output():
+            self.model = Llama(
+                model_path=self.model_path,
+                n_ctx=self.n_ctx,
+                n_threads=self.n_threads,
+                n_batch=self.n_batch,
+                n_gpu_layers=self.n_gpu_layers,
+                verbose=False,
+                use_mlock=True
+            )
+
+    def load_vocab(self):
+        """Tokenizer-only load (no weights, no context) for sizing prompts."""
+        with self.suppress_output():
+            self.model = Llama(model_path=self.model_path, vocab_only=True, verbose=False)
+
+    def count_tokens(self, text, add_bos=False):
+        if self.model is None:
+            self.load_vocab()
+        return len(self.model.tokenize(text.encode("utf-8"), add_bos=add_bos, special=True))
+
+    def close(self):
+        if self._batch_ctx is not None:
+            self._batch_ctx.close()
+            self._batch_ctx = None
+            self._batch_prefix = ()
+        if self.model is not None and hasattr(self.model, "close"):
+            self.model.close()
+        self.model = None
+        for draft in self._drafts.values():
+            if draft is not None:
+                draft.close()
+        self._drafts.clear()
+        self._prefix_states.clear()
+
+    def estimate_memory_mb(self):
+        """Rough resident size: weights file plus an f16 KV cache for n_ctx tokens."""
+        weights = os.path.getsize(self.model_path) if os.path.isfile(self.model_path) else 0
+        kv_per_token = 128 * 1024  # fallback until the model metadata is available
+        if self.model is not None:
+            meta = getattr(self.model, "metadata", None) or {}
+            arch = meta.get("general.architecture", "llama")
+            try:
+                layers = int(meta[f"{arch}.block_count"])
+                n_embd = int(meta[f"{arch}.embedding_length"])
+                n_head = int(meta[f"{arch}.attention.head_count"])
+                n_head_kv = int(meta.get(f"{arch}.attention.head_count_kv", n_head))
+                kv_per_token = 2 * layers * (n_embd * n_head_kv // n_head) * 2
+            except (KeyError, ValueError, ZeroDivisionError):
+                pass
+        contexts = 2 if self._batch_ctx is not None else 1
+        drafts = sum(os.path.getsize(d.model_path) for d in self._drafts.values() if d is not None)
+        return (weights + drafts + kv_per_token * self.n_ctx * contexts) / (1024 * 1024)
+    
+    def _resolve_params(self, model_params, max_tokens):
+        # Use model_params if provided, otherwise use defaults
+        if model_params:
+            stop_tokens = model_params.get("stop", ["\n"])
+            temperature = model_params.get("temperature", 0)
+            top_p = model_params.get("top_p", 0.9)
+            max_tokens = model_params.get("max_tokens", max_tokens)
+        else:
+            # Fallback defaults when no model_params provided
+            stop_tokens = ["\n"]
+            temperature = 0
+            top_p = 0.9
+        return stop_tokens, temperature, top_p, max_tokens
+
+    def _restore_prefix(self, prefix, prefix_source=None):
+        """
+        Bring the context to the state right after `prefix` was evaluated.
+        The completion call then only evaluates the tokens past the common
+        prefix (llama_cpp skips the longest matching prefix of input_ids).
+        `prefix_source` is the template file the prefix came from; it keys the
+        on-disk cache when one is attached.
+        """
+        state = self._prefix_states.get(prefix)
+        if state is None:
+            self.prefix_misses += 1
+            disk = self.prefix_disk_cache if prefix_source else None
+            state = disk.load(self.model_path, self.n_ctx, prefix, prefix_source) if disk else None
+            if state is not None:
+                self.model.load_state(state)
+            else:
+                tokens = self.model.tokenize(prefix.encode("utf-8"), add_bos=True, special=True)
+                self.model.reset()
+                self.model.eval(tokens)
+                state = self.model.save_state()
+                # Only the last logits row matters when logits_all is off; load_state
+                # broadcasts it back, so keep one row instead of n_tokens x n_vocab.
+                state.scores = state.scores[-1:, :].copy()
+                if disk:
+                    disk.save(self.model_path, self.n_ctx, prefix, prefix_source, state)
+            self._prefix_states[prefix] = state
+            while len(self._prefix_states) > self.PREFIX_CACHE_SIZE:
+                self._prefix_states.popitem(last=False)
+            return
+
+        self.prefix_hits += 1
+        self._prefix_states.move_to_end(prefix)
+        n = state.n_tokens
+        if self.model.n_tokens >= n and (self.model.input_ids[:n] == state.input_ids[:n]).all():
+            return  # context already holds this prefix
+        self.model.load_state(state)
+
+    def warm_prefix(self, prefix, prefix_source=None):
+        """Load (or evaluate once) the state after `prefix` ahead of the first infer()."""
+        if self.model is None:
+            self.load_model()
+        self._restore_prefix(prefix, prefix_source)
+
+    def _get_grammar(self, grammar_text):
+        grammar = self._grammars.get(grammar_text)
+        if grammar is None:
+            with self.suppress_output():
+                grammar = LlamaGrammar.from_string(grammar_text, verbose=False)
+            self._grammars[grammar_text] = grammar
+        return grammar
+
+    def _record_json_stop(self, saved):
+        self.json_early_stops += 1
+        self.tokens_saved += max(saved, 0)
+        print(f"[LLM] JSON object complete, stopped early ({max(saved, 0)} of max_tokens unused)")
+
+    @staticmethod
+    def _greedy_pick(logits, sampler=None, candidates=None):
+        import ctypes
+        import numpy as np
+        import llama_cpp
+
+        if sampler is None:
+            return int(np.argmax(logits))
+        # Grammar sampler masks disallowed tokens to -inf; greedy over the rest
+        candidates.copy_logits(logits)
+        llama_cpp.llama_sampler_apply(sampler, ctypes.byref(candidates.candidates))
+        return int(candidates.candidates_data.id[np.argmax(candidates.candidates_data.logit)])
+
+    @staticmethod
+    def _lookup_draft(ids, max_ngram, n_pred):
+        """Prompt-lookup draft: the tokens that followed the latest earlier occurrence of the last n-gram."""
+        import numpy as np
+
+        arr = np.asarray(ids, dtype=np.intc)
+        for n in range(min(max_ngram, len(arr) - 1), 0, -1):
+            windows = np.lib.stride_tricks.sliding_window_view(arr[:-1], n)
+            matches = np.nonzero((windows == arr[-n:]).all(axis=1))[0]
+            for i in matches[::-1]:
+                cont = arr[i + n:i + n + n_pred]
+                if len(cont):
+                    return cont.tolist()
+        return []
+
+    def _get_draft(self, name):
+        """Small model next to the main one that proposes tokens; None if missing or its vocab differs."""
+        if name not in self._drafts:
+            path = os.path.join(os.path.dirname(self.model_path), name)
+            draft = None
+            try:
+                with self.suppress_output():
+                    draft = Llama(model_path=path, n_ctx=self.n_ctx, n_threads=self.n_threads,
+                                  n_batch=self.n_batch, n_gpu_layers=self.n_gpu_layers, verbose=False)
+                if draft.n_vocab() != self.model.n_vocab():
+                    print(f"[LLM] draft model {name} has a different vocabulary, using prompt lookup")
+                    draft.close()
+                    draft = None
+            except Exception as e:
+                print(f"[LLM] could not load draft model {name}: {e}")
+            self._drafts[name] = draft
+        return self._drafts[name]
+
+    @staticmethod
+    def _draft_propose(draft, ids, n_pred):
+        import numpy as np
+        import llama_cpp
+
+        # Reuse the draft context up to the first token that differs
+        keep = 0
+        limit = min(draft.n_tokens, len(ids) - 1)
+        while keep < limit and draft.input_ids[keep] == ids[keep]:
+            keep += 1
+        draft.n_tokens = keep
+        draft.eval(ids[keep:])
+        out = []
+        while len(out) < n_pred and draft.n_tokens < draft.n_ctx():
+            logits = np.ctypeslib.as_array(draft._ctx.get_logits_ith(-1), shape=(draft.n_vocab(),))
+            tok = int(np.argmax(logits))
+            if llama_cpp.llama_vocab_is_eog(draft._model.vocab, tok):
+                break
+            out.append(tok)
+            if len(out) < n_pred:
+                draft.eval([tok])
+        return out
+
+    def _speculative_generate(self, prompt, stop_tokens, max_tokens, grammar, speculative,
+                              deadline=None, cancel_event=None, stop_at_json=False):
+        """
+        Greedy decoding that verifies several drafted tokens per decode call.
+        Drafts come from n-gram lookup in the prompt and output so far
+        ("prompt_lookup") or from a small model with the same vocabulary
+        ("draft_model"). The main model's own pick decides every position, so
+        the text is the same as plain greedy decoding.
+        """
+        import llama_cpp
+        import numpy as np
+        from llama_cpp import _internals
+
+        if isinstance(speculative, str):
+            speculative = {"mode": speculative}
+        model = self.model
+        ctx = model._ctx
+        vocab = model._model.vocab
+        n_vocab = model.n_vocab()
+        n_pred = int(speculative.get("num_pred_tokens", 10))
+        max_ngram = int(speculative.get("max_ngram_size", 3))
+        draft = None
+        if speculative.get("mode") == "draft_model" and speculative.get("draft_model"):
+            draft = self._get_draft(speculative["draft_model"])
+
+        # Keep whatever prefix the context already holds (e.g. a restored
+        # template prefix) and evaluate the rest; at least one token is
+        # replayed so the last logits are fresh.
+        tokens = model.tokenize(prompt.encode("utf-8"), add_bos=True, special=True)
+        keep = 0
+        limit = min(model.n_tokens, len(tokens) - 1)
+        while keep < limit and model.input_ids[keep] == tokens[keep]:
+            keep += 1
+        model.n_tokens = keep
+        model.eval(tokens[keep:])
+        logits = np.ctypeslib.as_array(ctx.get_logits_ith(-1), shape=(n_vocab,))
+
+        sampler = candidates = None
+        if grammar:
+            sampler = llama_cpp.llama_sampler_init_grammar(vocab, grammar.encode("utf-8"), b"root")
+            candidates = _internals.LlamaTokenDataArray(n_vocab=n_vocab)
+        tracker = JsonObjectTracker() if stop_at_json else None
+        history = list(tokens)
+        raw, text, generated = b"", "", 0
+        drafted = accepted = 0
+        batch = llama_cpp.llama_batch_init(n_pred + 1, 0, 1)
+        try:
+            next_tok = self._greedy_pick(logits, sampler, candidates)
+            done = False
+            while not done and model.n_tokens < self.n_ctx:
+                self.check_abort(deadline, cancel_event)
+                room = min(n_pred, max_tokens - generated - 1, self.n_ctx - model.n_tokens - 1)
+                proposal = []
+                if room > 0:
+                    ids = history + [next_tok]
+                    proposal = (self._draft_propose(draft, ids, room) if draft
+                                else self._lookup_draft(ids, max_ngram, room))[:room]
+                seq = [next_tok] + proposal
+                n_past = model.n_tokens
+                for j, tok in enumerate(seq):
+                    batch.token[j] = tok
+                    batch.pos[j] = n_past + j
+                    batch.n_seq_id[j] = 1
+                    batch.seq_id[j][0] = 0
+                    batch.logits[j] = True
+                batch.n_tokens = len(seq)
+                rc = llama_cpp.llama_decode(ctx.ctx, batch)
+                if rc != 0:
+                    raise RuntimeError(f"llama_decode returned {rc}")
+
+                # seq[0] is the model's own pick; each later draft token is kept
+                # only while it equals what the model picks at that position
+                n_ok = 0
+                for j, tok in enumerate(seq):
+                    if llama_cpp.llama_vocab_is_eog(vocab, tok):
+                        done = True
+                        break
+                    if sampler is not None:
+                        llama_cpp.llama_sampler_accept(sampler, tok)
+                    n_ok += 1
+                    generated += 1
+                    history.append(tok)
+                    raw += model.detokenize([tok])
+                    seen = len(text)
+                    text = raw.decode("utf-8", errors="ignore")
+                    hit = next((st for st in stop_tokens if st and st in text), None)
+                    end = tracker.feed(text[seen:]) if tracker else None
+                    if hit is not None:
+                        text = text[:text.index(hit)]
+                        done = True
+                    elif end is not None:
+                        text = text[:seen + end]
+                        self._record_json_stop(max_tokens - generated)
+                        done = True
+                    elif generated >= max_tokens:
+                        done = True
+                    if done:
+                        break
+                    logits = np.ctypeslib.as_array(ctx.get_logits_ith(j), shape=(n_vocab,))
+                    pick = self._greedy_pick(logits, sampler, candidates)
+                    if j + 1 < len(seq) and pick == seq[j + 1]:
+                        continue
+                    next_tok = pick
+                    break
+                drafted += len(proposal)
+                accepted += max(n_ok - 1, 0)
+                # Drop the KV entries of rejected draft tokens
+                model.input_ids[n_past:n_past + n_ok] = seq[:n_ok]
+                model.n_tokens = n_past + n_ok
+                ctx.kv_cache_seq_rm(-1, model.n_tokens, -1)
+        finally:
+            llama_cpp.llama_batch_free(batch)
+            if sampler is not None:
+                llama_cpp.llama_sampler_free(sampler)
+            model._requires_eval = True
+
+        self.spec_drafted += drafted
+        self.spec_accepted += accepted
+        rate = accepted / drafted if drafted else 0.0
+        print(f"[LLM] speculative: {accepted}/{drafted} drafted tokens accepted ({rate:.0%}), {generated} generated")
+        return text
+
+    @staticmethod
+    def check_abort(deadline, cancel_event):
+        if cancel_event is not None and cancel_event.is_set():
+            raise InferenceCancelled("generation cancelled")
+        if deadline is not None and time.time() > deadline:
+            raise InferenceTimeout("generation passed its deadline")
+
+    def infer(self, prompt, model_params=None, max_tokens=64, prefix=None, prefix_source=None, grammar=None,
+              deadline=None, cancel_event=None):
+        """
+        Run one completion. With a `deadline` (epoch seconds) or a
+        `cancel_event`, tokens are streamed and both are checked between
+        tokens, raising InferenceTimeout / InferenceCancelled mid-generation.
+        With `stop_at_json` in model_params, decoding also stops as soon as
+        a balanced top-level JSON object has been produced.
+        """
+        if self.model is None:
+            self.load_model()
+        
+        stop_tokens, temperature, top_p, max_tokens = self._resolve_params(model_params, max_tokens)
+        stop_at_json = bool(model_params and model_params.get("stop_at_json"))
+        streaming = deadline is not None or cancel_event is not None or stop_at_json
+        
+        start = time.time()
+        self.call_count += 1
+        print(f"[LLM] Call #{self.call_count} starting inference with prompt length: {len(prompt)}")
+        self.check_abort(deadline, cancel_event)
+        if prefix and prompt.startswith(prefix):
+            self._restore_prefix(prefix, prefix_source)
+        speculative = model_params.get("speculative") if model_params else None
+        if speculative and temperature == 0:
+            text = self._speculative_generate(prompt, stop_tokens, max_tokens, grammar, speculative,
+                                              deadline, cancel_event, stop_at_json)
+            return text.strip(), round(time.time() - start, 3)
+        output = self.model(
+            prompt, 
+            max_tokens=max_tokens, 
+            stop=stop_tokens, 
+            temperature=temperature,
+            top_p=top_p,
+            echo=False,
+            grammar=self._get_grammar(grammar) if grammar else None,
+            stream=streaming
+        )
+        if streaming:
+            pieces = []
+            tracker = JsonObjectTracker() if stop_at_json else None
+            generated = 0
+            try:
+                for chunk in output:
+                    piece = chunk["choices"][0]["text"]
+                    generated += 1
+                    end = tracker.feed(piece) if tracker else None
+                    if end is not None:
+                        pieces.append(piece[:end])
+                        break
+                    pieces.append(piece)
+                    self.check_abort(deadline, cancel_event)
+            finally:
+                output.close()
+            text = "".join(pieces)
+            if tracker and tracker.done:
+                self._record_json_stop(max_tokens - generated)
+        else:
+            text = output["choices"][0]["text"]
+        end = time.time()
+        
+        result = text.strip()
+        return result, round(end - start, 3)
+
+    def infer_batch(self, requests):
+        """
+        Run several (prompt, model_params, max_tokens[, grammar, deadline,
+        cancel_event, prefix, prefix_source]) requests together. Greedy
+        requests are decoded as separate sequences of one shared context,
+        grouped by prompt prefix and packed so the prefix plus each
+        sequence's remainder and budget fit in n_ctx, each with its own
+        grammar sampler when constrained; sampled requests, and any group
+        the batch context rejects, go through infer() one by one.
+        Returns a list with (result, latency) or the exception that ended
+        each request.
+        """
+        if self.model is None:
+            self.load_model()
+
+        def run_single(i):
+            prompt, model_params, max_tokens, *rest = requests[i]
+            grammar, deadline, cancel_event, prefix, prefix_source = (list(rest) + [None] * 5)[:5]
+            try:
+                results[i] = self.infer(prompt, model_params, max_tokens, prefix=prefix, prefix_source=prefix_source,
+                                        grammar=grammar, deadline=deadline, cancel_event=cancel_event)
+            except Exception as e:
+                results[i] = e
+
+        results = [None] * len(requests)
+        by_prefix = {}  # prefix tokens -> entries, in arrival order
+        prefix_tokens = {}  # prefix text -> tokens
+        for i, (prompt, model_params, max_tokens, *rest) in enumerate(requests):
+            grammar, deadline, cancel_event, prefix, _ = (list(rest) + [None] * 5)[:5]
+            stop_tokens, temperature, _, max_tokens = self._resolve_params(model_params, max_tokens)
+            if temperature != 0:
+                run_single(i)
+                continue
+            tokens = self.model.tokenize(prompt.encode("utf-8"), add_bos=True, special=True)
+            shared = ()
+            if prefix and prompt.startswith(prefix):
+                if prefix not in prefix_tokens:
+                    prefix_tokens[prefix] = tuple(self.model.tokenize(prefix.encode("utf-8"), add_bos=True, special=True))
+                shared = prefix_tokens[prefix]
+                if len(tokens) <= len(shared) or tuple(tokens[:len(shared)]) != shared:
+                    shared = ()  # the prompt doesn't tokenize into prefix + rest
+            by_prefix.setdefault(shared, []).append((i, tokens, stop_tokens, max_tokens, grammar, deadline, cancel_event))
+
+        groups = []
+        for shared, entries in by_prefix.items():
+            current, used = [], len(shared)
+            for entry in entries:
+                needed = len(entry[1]) - len(shared) + entry[3]
+                if current and used + needed > self.n_ctx:
+                    groups.append((shared, current))
+                    current, used = [], len(shared)
+                current.append(entry)
+                used += needed
+            if current:
+                groups.append((shared, current))
+
+        for shared, group in groups:
+            if len(group) > 1:
+                try:
+                    params = [requests[e[0]][1] for e in group]
+                    for entry, res in zip(group, self._decode_batch(group, params, shared)):
+                        results[entry[0]] = res
+                    continue
+                except Exception as e:
+                    print(f"[LLM] batched decode failed, running sequentially: {e}")
+            for entry in group:
+                run_single(entry[0])
+        return results
+
+    def _get_batch_ctx(self, n_seq):
+        """Second context whose KV cache is shared by up to n_seq sequences."""
+        if self._batch_ctx is None or self._batch_ctx_seqs < n_seq:
+            import llama_cpp
+            from llama_cpp import _internals
+
+            params = llama_cpp.llama_context_params.from_buffer_copy(self.model.context_params)
+            params.n_seq_max = n_seq
+            if hasattr(params, "kv_unified"):
+                params.kv_unified = True
+            if self._batch_ctx is not None:
+                self._batch_ctx.close()
+            self._batch_prefix = ()
+            with self.suppress_output():
+                self._batch_ctx = _internals.LlamaContext(model=self.model._model, params=params, verbose=False)
+            self._batch_ctx_seqs = n_seq
+        return self._batch_ctx
+
+    def _decode_batch(self, group, group_params, shared=()):
+        import llama_cpp
+        import numpy as np
+        from llama_cpp import _internals
+
+        start = time.time()
+        n_seq = len(group)
+        ctx = self._get_batch_ctx(n_seq)
+        n_vocab = self.model.n_vocab()
+        vocab = self.model._model.vocab
+        self.call_count += n_seq
+        print(f"[LLM] Batched decode of {n_seq} sequences")
+
+        candidates = None
+        samplers = [None] * n_seq
+        for s, (_, _, _, _, grammar, _, _) in enumerate(group):
+            if grammar:
+                samplers[s] = llama_cpp.llama_sampler_init_grammar(vocab, grammar.encode("utf-8"), b"root")
+                if candidates is None:
+                    candidates = _internals.LlamaTokenDataArray(n_vocab=n_vocab)
+
+        def pick(seq, logits):
+            return self._greedy_pick(logits, samplers[seq], candidates)
+
+        batch = llama_cpp.llama_batch_init(self.n_batch, 0, 1)
+        try:
+            def run(entries):
+                # entries: (seq_id, token, pos, want_logits) -> {seq_id: next token}
+                for j, (seq, tok, pos, want) in enumerate(entries):
+                    batch.token[j] = tok
+                    batch.pos[j] = pos
+                    batch.n_seq_id[j] = 1
+                    batch.seq_id[j][0] = seq
+                    batch.logits[j] = want
+                batch.n_tokens = len(entries)
+                rc = llama_cpp.llama_decode(ctx.ctx, batch)
+                if rc != 0:
+                    raise RuntimeError(f"llama_decode returned {rc}")
+                picks = {}
+                for j, (seq, _, _, want) in enumerate(entries):
+                    if want:
+                        logits = np.ctypeslib.as_array(llama_cpp.llama_get_logits_ith(ctx.ctx, j), shape=(n_vocab,))
+                        picks[seq] = pick(seq, logits)
+                return picks
+
+            # Shared prompt prefix: evaluated once into seq 0, where it stays for
+            # the next batch with the same prefix, and copied to the other sequences
+            n_shared = len(shared)
+            if n_shared and self._batch_prefix == shared:
+                ctx.kv_cache_seq_rm(0, n_shared, -1)
+                for s in range(1, self._batch_ctx_seqs):
+                    ctx.kv_cache_seq_rm(s, 0, -1)
+                self.prefix_hits += n_seq
+            else:
+                ctx.kv_cache_clear()
+                self._batch_prefix = ()
+                if n_shared:
+                    entries = [(0, tok, pos, False) for pos, tok in enumerate(shared)]
+                    for k in range(0, n_shared, self.n_batch):
+                        run(entries[k:k + self.n_batch])
+                    self._batch_prefix = shared
+                    self.prefix_misses += 1
+                    self.prefix_hits += n_seq - 1
+            if n_shared:
+                for s in range(1, n_seq):
+                    ctx.kv_cache_seq_cp(0, s, 0, n_shared)
+
+            # Prompt phase: logits are only kept for the last decode, so each
+            # sequence's first token is picked right after its last prompt token.
+            pending = [
+                (s, tokens[pos], pos, pos == len(tokens) - 1)
+                for s, (_, tokens, _, _, _, _, _) in enumerate(group)
+                for pos in range(n_shared, len(tokens))
+            ]
+            next_tok = {}
+            for k in range(0, len(pending), self.n_batch):
+                next_tok.update(run(pending[k:k + self.n_batch]))
+
+            positions = [len(tokens) for _, tokens, _, _, _, _, _ in group]
+            generated = [0] * n_seq
+            raw = [b""] * n_seq
+            texts = [""] * n_seq
+            trackers = [JsonObjectTracker() if params and params.get("stop_at_json") else None
+                        for params in group_params]
+            aborted = [None] * n_seq
+            active = set(range(n_seq))
+            while active:
+                for s in sorted(active):
+                    tok = next_tok[s]
+                    _, _, stop_tokens, max_tokens, _, deadline, cancel_event = group[s]
+                    try:
+                        self.check_abort(deadline, cancel_event)
+                    except (InferenceTimeout, InferenceCancelled) as e:
+                        # Drop the sequence; the others keep decoding
+                        aborted[s] = e
+                        active.discard(s)
+                        continue
+                    if llama_cpp.llama_vocab_is_eog(vocab, tok):
+                        active.discard(s)
+                        continue
+                    if samplers[s] is not None:
+                        llama_cpp.llama_sampler_accept(samplers[s], tok)
+                    generated[s] += 1
+                    raw[s] += self.model.detokenize([tok])
+                    seen = len(texts[s])
+                    texts[s] = raw[s].decode("utf-8", errors="ignore")
+                    hit = next((st for st in stop_tokens if st and st in texts[s]), None)
+                    end = trackers[s].feed(texts[s][seen:]) if trackers[s] else None
+                    if hit is not None:
+                        texts[s] = texts[s][:texts[s].index(hit)]
+                        active.discard(s)
+                    elif end is not None:
+                        texts[s] = texts[s][:seen + end]
+                        self._record_json_stop(max_tokens - generated[s])
+                        active.discard(s)
+                    elif generated[s] >= max_tokens:
+                        active.discard(s)
+                if not active:
+                    break
+                entries = [(s, next_tok[s], positions[s], True) for s in sorted(active)]
+                for s in active:
+                    positions[s] += 1
+                next_tok = run(entries)
+        finally:
+            llama_cpp.llama_batch_free(batch)
+            for sampler in samplers:
+                if sampler is not None:
+                    llama_cpp.llama_sampler_free(sampler)
+
+        latency = round(time.time() - start, 3)
+        return [aborted[s] or (texts[s].strip(), latency) for s in range(n_seq)]
+
+
+    @staticmethod
+    def list_available_models(model_dir="../../models"):
+        files = os.listdir(os.path.abspath(model_dir))
         return [f for f in files if f.endswith(".gguf")]
\ No newline at end of file
@@ -1,15 +1,8 @@
 # main_ui.py
-import flet as ft
-from log_sources_tab import log_sources_tab
-from template_mapper_tab import template_mapper_tab
-from models_tab import models_tab
-from sample_test_tab import sample_test_tab
-from output_config_tab import output_config_tab
-from services_handler import services_handler
-from global_config_tab import global_config_tab
+import multiprocessing
 
 
-def main(page: ft.Page):
+def main(page: "ft.Page"):
     page.title = "LoGEM - Log Intelligence"
     page.window.width = 1050
     page.window.height = 700
@@ -18,6 +11,8 @@ def main(page: ft.Page):
     page.horizontal_alignment = ft.CrossAxisAlignment.CENTER
     page.scroll = "none"
 
+    services_handler = get_services_handler()
+
     # Auto-restore services before UI shows
     services_handler.autostart_from_states()
 
@@ -53,4 +48,17 @@ def main(page: ft.Page):
     )
     page.add(tabs)
 
-ft.app(target=main, view=ft.AppView.FLET_APP)
+if __name__ == "__main__":
+    # Inference and backfill workers are spawned processes that re-import this
+    # module as __mp_main__; the UI and services are only imported here
+    multiprocessing.freeze_support()
+    import flet as ft
+    from log_sources_tab import log_sources_tab
+    from template_mapper_tab import template_mapper_tab
+    from models_tab import models_tab
+    from sample_test_tab import sample_test_tab
+    from output_config_tab import output_config_tab
+    from services_handler import get_services_handler
+    from global_config_tab import global_config_tab
+
+    ft.app(target=main, view=ft.AppView.FLET_APP)
@@ -0,0 +1,101 @@
+import threading
+from collections import OrderedDict
+from llm_handler import LLMHandler
+
+
+class ModelPoolHandler:
+    """
+    Keeps loaded LLMHandler instances keyed by (model_name, n_ctx, n_gpu_layers)
+    so switching context buckets or templates does not reload the GGUF.
+    Least recently used instances are evicted once the RAM budget is exceeded.
+    """
+
+    def __init__(self, model_dir="../../models", ram_budget_mb=4096, prefix_cache=None, n_threads=None):
+        self.model_dir = model_dir
+        self.ram_budget_mb = ram_budget_mb
+        self.n_threads = n_threads  # None keeps LLMHandler's default
+        self.prefix_cache = prefix_cache  # shared PrefixCacheHandler, attached to every instance
+        self._lock = threading.Lock()
+        self._pool = OrderedDict()  # (model_name, n_ctx, n_gpu_layers) -> LLMHandler
+        self._vocab_only = {}  # model_name -> vocab-only LLMHandler used for token counting
+        self.hits = 0
+        self.loads = 0
+        self.evictions = 0
+
+    def _find_loaded(self, model_name, n_ctx, n_gpu_layers):
+        # Exact bucket first, otherwise the smallest loaded context that still fits
+        key = (model_name, n_ctx, n_gpu_layers)
+        if key in self._pool:
+            return key
+        larger = [
+            k for k in self._pool
+            if k[0] == model_name and k[2] == n_gpu_layers and k[1] >= n_ctx
+        ]
+        return min(larger, key=lambda k: k[1]) if larger else None
+
+    def _used_mb(self):
+        return sum(llm.estimate_memory_mb() for llm in self._pool.values())
+
+    def _evict_for(self, needed_mb):
+        if not self.ram_budget_mb or self.ram_budget_mb <= 0:
+            return
+        while self._pool and self._used_mb() + needed_mb > self.ram_budget_mb:
+            key, llm = self._pool.popitem(last=False)
+            llm.close()
+            self.evictions += 1
+            print(f"[pool] evicted {key[0]} ctx={key[1]} gpu_layers={key[2]}")
+
+    def get(self, model_name, n_ctx, n_gpu_layers):
+        with self._lock:
+            key = self._find_loaded(model_name, n_ctx, n_gpu_layers)
+            if key is not None:
+                self._pool.move_to_end(key)
+                self.hits += 1
+                return self._pool[key]
+
+            llm = LLMHandler(model_name=model_name, model_dir=self.model_dir,
+                             n_ctx=n_ctx, n_threads=self.n_threads, n_gpu_layers=n_gpu_layers)
+            llm.prefix_disk_cache = self.prefix_cache
+            self._evict_for(llm.estimate_memory_mb())
+            llm.load_model()
+            self.loads += 1
+            self._pool[(model_name, n_ctx, n_gpu_layers)] = llm
+            print(f"[pool] loaded {model_name} ctx={n_ctx} gpu_layers={n_gpu_layers} "
+                  f"({len(self._pool)} in pool)")
+            return llm
+
+    def tokenizer(self, model_name):
+        """
+        Vocab-only instance of the model for token counting. Pooled instances
+        are never handed out for this: counting runs without the inference
+        lock, and eviction could close them mid-tokenize.
+        """
+        with self._lock:
+            tok = self._vocab_only.get(model_name)
+            if tok is None:
+                tok = LLMHandler(model_name=model_name, model_dir=self.model_dir)
+                tok.load_vocab()
+                self._vocab_only[model_name] = tok
+            return tok
+
+    def clear(self):
+        with self._lock:
+            for llm in list(self._pool.values()) + list(self._vocab_only.values()):
+                llm.close()
+            self._pool.clear()
+            self._vocab_only.clear()
+
+    def stats(self):
+        with self._lock:
+            return {
+                "loaded": [list(k) for k in self._pool],
+                "used_mb": round(self._used_mb(), 1),
+                "budget_mb": self.ram_budget_mb,
+                "hits": self.hits,
+                "loads": self.loads,
+                "evictions": self.evictions,
+                "json_early_stops": sum(llm.json_early_stops for llm in self._pool.values()),
+                "tokens_saved": sum(llm.tokens_saved for llm in self._pool.values()),
+                "spec_drafted": sum(llm.spec_drafted for llm in self._pool.values()),
+                "spec_accepted": sum(llm.spec_accepted for llm in self._pool.values()),
+            }
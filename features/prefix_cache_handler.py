@@ -0,0 +1,177 @@
+import os
+import json
+import struct
+import hashlib
+import threading
+import numpy as np
+
+
+class PrefixCacheHandler:
+    """
+    On-disk store of evaluated template-prefix llama states so a restarted
+    service skips prefix evaluation. Entries are keyed by model hash,
+    template file hash, n_ctx and prefix text hash, and are read back
+    with one plain read. Files are evicted by total size cap and when the
+    template file they were built from has changed or disappeared.
+
+    File layout: MAGIC | u32 header length | JSON header | input_ids | scores | llama_state
+    """
+
+    MAGIC = b"LGPC1"
+
+    def __init__(self, cache_dir="../cache/prefix", max_size_mb=2048):
+        self.cache_dir = cache_dir
+        self.max_size_mb = max_size_mb
+        self._lock = threading.Lock()
+        self._hash_cache = {}  # path -> ((size, mtime), digest)
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    # ---------- keys ----------
+    def _file_hash(self, path, sample=4 * 1024 * 1024):
+        # Weights are GBs: hash size, mtime and the head/tail samples instead of everything
+        st = os.stat(path)
+        stamp = (st.st_size, st.st_mtime)
+        cached = self._hash_cache.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        h = hashlib.sha1(f"{st.st_size}".encode())
+        with open(path, "rb") as f:
+            h.update(f.read(sample))
+            if st.st_size > sample:
+                f.seek(max(sample, st.st_size - sample))
+                h.update(f.read(sample))
+        digest = h.hexdigest()[:16]
+        self._hash_cache[path] = (stamp, digest)
+        return digest
+
+    def _entry_path(self, model_path, n_ctx, prefix, template_path):
+        model_hash = self._file_hash(model_path)
+        template_hash = self._file_hash(template_path)
+        prefix_hash = hashlib.sha1(prefix.encode("utf-8")).hexdigest()[:16]
+        name = f"{model_hash}_{n_ctx}_{template_hash}_{prefix_hash}_{os.path.basename(template_path)}.state"
+        return os.path.join(self.cache_dir, name)
+
+    # ---------- load / save ----------
+    def load(self, model_path, n_ctx, prefix, template_path):
+        from llama_cpp import LlamaState
+
+        try:
+            path = self._entry_path(model_path, n_ctx, prefix, template_path)
+        except OSError:
+            return None
+        if not os.path.isfile(path):
+            return None
+        try:
+            # One plain read: load_state copies ids, scores and state into the
+            # context anyway, so the arrays below are views over this buffer
+            with open(path, "rb") as f:
+                data = memoryview(f.read())
+            if data[:len(self.MAGIC)] != self.MAGIC:
+                return None
+            off = len(self.MAGIC)
+            (hlen,) = struct.unpack_from("<I", data, off)
+            off += 4
+            header = json.loads(bytes(data[off:off + hlen]).decode("utf-8"))
+            off += hlen
+            input_ids = np.frombuffer(data, dtype=header["ids_dtype"], count=header["ids_len"], offset=off)
+            off += input_ids.nbytes
+            scores = np.frombuffer(data, dtype=header["scores_dtype"], count=header["n_vocab"], offset=off)
+            off += scores.nbytes
+            llama_state = data[off:off + header["state_size"]]
+            if len(llama_state) != header["state_size"]:
+                return None
+            os.utime(path)  # recency for size-cap eviction
+        except Exception as e:
+            print(f"[prefix-cache] failed to read {path}: {e}")
+            return None
+
+        kwargs = dict(
+            input_ids=input_ids,
+            scores=scores.reshape(1, -1),
+            n_tokens=header["n_tokens"],
+            llama_state=llama_state,
+            llama_state_size=header["state_size"],
+        )
+        if "seed" in header:
+            try:
+                return LlamaState(seed=header["seed"], **kwargs)
+            except TypeError:
+                pass
+        return LlamaState(**kwargs)
+
+    def save(self, model_path, n_ctx, prefix, template_path, state):
+        try:
+            path = self._entry_path(model_path, n_ctx, prefix, template_path)
+        except OSError:
+            return
+        scores = np.ascontiguousarray(state.scores[-1:, :])
+        input_ids = np.ascontiguousarray(state.input_ids)
+        header = {
+            "n_tokens": int(state.n_tokens),
+            "ids_dtype": input_ids.dtype.str,
+            "ids_len": int(input_ids.size),
+            "scores_dtype": scores.dtype.str,
+            "n_vocab": int(scores.shape[-1]),
+            "state_size": int(state.llama_state_size),
+        }
+        if getattr(state, "seed", None) is not None:
+            header["seed"] = int(state.seed)
+        raw_header = json.dumps(header).encode("utf-8")
+
+        with self._lock:
+            tmp = path + ".tmp"
+            try:
+                with open(tmp, "wb") as f:
+                    f.write(self.MAGIC)
+                    f.write(struct.pack("<I", len(raw_header)))
+                    f.write(raw_header)
+                    f.write(input_ids.tobytes())
+                    f.write(scores.tobytes())
+                    f.write(state.llama_state[:state.llama_state_size])
+                os.replace(tmp, path)
+            except OSError as e:
+                print(f"[prefix-cache] failed to write {path}: {e}")
+                return
+            self._enforce_size_cap()
+
+    # ---------- eviction ----------
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".state"):
+                continue
+            full = os.path.join(self.cache_dir, name)
+            try:
+                st = os.stat(full)
+            except OSError:
+                continue
+            entries.append((full, name, st.st_size, st.st_mtime))
+        return entries
+
+    def _enforce_size_cap(self):
+        if not self.max_size_mb or self.max_size_mb <= 0:
+            return
+        entries = sorted(self._entries(), key=lambda e: e[3])  # oldest use first
+        total = sum(e[2] for e in entries)
+        cap = self.max_size_mb * 1024 * 1024
+        while entries and total > cap:
+            full, name, size, _ = entries.pop(0)
+            os.remove(full)
+            total -= size
+            print(f"[prefix-cache] evicted {name}")
+
+    def prune_stale(self, template_paths):
+        """Drop entries whose template file is gone or no longer has the hash they were built from."""
+        current = {}
+        for p in template_paths:
+            try:
+                current[os.path.basename(p)] = self._file_hash(p)
+            except OSError:
+                pass
+        with self._lock:
+            for full, name, _, _ in self._entries():
+                parts = name[:-len(".state")].split("_", 4)
+                if len(parts) != 5 or current.get(parts[4]) != parts[2]:
+                    os.remove(full)
+                    print(f"[prefix-cache] removed stale {name}")
+            self._enforce_size_cap()
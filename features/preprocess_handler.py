@@ -0,0 +1,132 @@
+import re
+import threading
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr
+
+
+class PreprocessHandler:
+    """
+    Shrinks RAW_LOG payloads before prompt construction. XML records lose
+    namespaces, Guid attributes, empty elements and indentation; leaves not
+    related to the template's keys are dropped, and when the result is still
+    over budget the least relevant leaves go first instead of cutting the
+    tail off. Plain text only has its whitespace collapsed.
+
+    Modes (template `preprocess` key): "xml" (default, compact XML), "kv"
+    (Name=value pairs) or "off" (plain truncation as before).
+    """
+
+    DROP_ATTRS = {"guid", "xmlns"}
+    ALWAYS_KEEP = {"eventid", "provider", "channel"}
+    REPORT_EVERY = 100
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}  # template name -> {"lines", "tokens_in", "tokens_out"}
+
+    # ---------- relevance ----------
+    @staticmethod
+    def _words(name):
+        # "Source_Network_Address" / "IpAddress" -> {"source", "network", "address"} / {"ip", "address"}
+        parts = re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+", name)
+        return {p.lower() for p in parts if len(p) >= 3}
+
+    @classmethod
+    def _relevant(cls, name, key_words, key_names):
+        norm = re.sub(r"[^a-z0-9]", "", name.lower())
+        return norm in key_names or norm in cls.ALWAYS_KEEP or bool(cls._words(name) & key_words)
+
+    @staticmethod
+    def _local(tag):
+        return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+    # ---------- XML ----------
+    def _leaves(self, root):
+        """[(label, element, text, kept attributes)] for every element that carries a value."""
+        leaves = []
+        for el in root.iter():
+            if len(el) or el is root:
+                continue
+            text = (el.text or "").strip()
+            attrs = {k: v for k, v in el.attrib.items()
+                     if self._local(k).lower() not in self.DROP_ATTRS and v != ""}
+            if not text and not attrs:
+                continue  # <Correlation/>, <Security/>, empty Data
+            tag = self._local(el.tag)
+            label = el.get("Name", tag) if tag == "Data" else tag
+            leaves.append((label, el, text, attrs))
+        return leaves
+
+    def _render(self, leaves, mode):
+        if mode == "kv":
+            parts = []
+            for label, _, text, attrs in leaves:
+                if text:
+                    parts.append(f"{label}={text}")
+                for k, v in attrs.items():
+                    if k != "Name":
+                        parts.append(f"{label}.{self._local(k)}={v}")
+            return " ".join(parts)
+        parts = []
+        for _, el, text, attrs in leaves:
+            tag = self._local(el.tag)
+            attr_str = "".join(f" {self._local(k)}={quoteattr(v)}" for k, v in attrs.items())
+            parts.append(f"<{tag}{attr_str}>{escape(text)}</{tag}>" if text else f"<{tag}{attr_str}/>")
+        return "".join(parts)
+
+    def _reduce_xml(self, root, keys, max_size, mode):
+        leaves = self._leaves(root)
+        if keys:
+            key_words = set().union(*(self._words(k) for k in keys))
+            key_names = {re.sub(r"[^a-z0-9]", "", k.lower()) for k in keys}
+            leaves = [leaf for leaf in leaves if self._relevant(leaf[0], key_words, key_names)]
+        text = self._render(leaves, mode)
+        if len(text) <= max_size:
+            return text
+        # Over budget: System boilerplate goes before event data, later leaves
+        # before earlier ones; EventID/Provider/Channel stay
+        system = {id(el) for section in root if self._local(section.tag) == "System" for el in section.iter()}
+        order = sorted(
+            (i for i, leaf in enumerate(leaves)
+             if re.sub(r"[^a-z0-9]", "", leaf[0].lower()) not in self.ALWAYS_KEEP),
+            key=lambda i: (id(leaves[i][1]) not in system, -i))
+        dropped = set()
+        for i in order:
+            dropped.add(i)
+            text = self._render([leaf for j, leaf in enumerate(leaves) if j not in dropped], mode)
+            if len(text) <= max_size:
+                break
+        return text[:max_size]
+
+    # ---------- entry point ----------
+    def reduce(self, text, keys, max_size, mode="xml", root=None):
+        """Return the payload to put after RAW_LOG, at most max_size characters."""
+        if mode == "off":
+            return text[:max_size]
+        if root is None and text.lstrip().startswith("<"):
+            try:
+                root = ET.fromstring(text)
+            except ET.ParseError:
+                root = None
+        if root is not None:
+            return self._reduce_xml(root, keys, max_size, mode)
+        return re.sub(r"\s+", " ", text).strip()[:max_size]
+
+    # ---------- stats ----------
+    def record(self, template_name, tokens_in, tokens_out):
+        with self._lock:
+            s = self._stats.setdefault(template_name, {"lines": 0, "tokens_in": 0, "tokens_out": 0})
+            s["lines"] += 1
+            s["tokens_in"] += tokens_in
+            s["tokens_out"] += tokens_out
+            if s["lines"] % self.REPORT_EVERY == 0:
+                saved = 1 - s["tokens_out"] / s["tokens_in"] if s["tokens_in"] else 0.0
+                print(f"[preprocess][{template_name}] RAW_LOG tokens {s['tokens_in']} -> {s['tokens_out']} "
+                      f"({saved:.0%} saved over {s['lines']} lines)")
+
+    def stats(self):
+        with self._lock:
+            out = {}
+            for template_name, s in self._stats.items():
+                out[template_name] = dict(s, tokens_saved=s["tokens_in"] - s["tokens_out"])
+            return out
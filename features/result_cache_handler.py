@@ -0,0 +1,169 @@
+import re
+import time
+import threading
+from collections import OrderedDict
+from configs_handler import ConfigsHandler
+
+
+class ResultCacheHandler:
+    """
+    LLM results keyed by template scope + a normalized form of the log line.
+    Volatile tokens (timestamps, record ids, pids, ports, GUIDs, hex ids,
+    IPs) are masked in the key; the cached response keeps placeholders where
+    those values appeared, so a hit is re-filled with the fresh values.
+
+    A response is only cached when every volatile-looking token in it maps
+    back to exactly one value of the line; anything the model derived from
+    a volatile value (e.g. a reformatted timestamp) makes it uncacheable.
+    """
+
+    # Applied in order; each captures the volatile span in group 1
+    VOLATILE_PATTERNS = [
+        re.compile(r"(\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?)"),
+        re.compile(r"\b((?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)\s+\d{1,2}\s+\d{2}:\d{2}:\d{2})"),
+        re.compile(r"\b(\d{2}:\d{2}:\d{2}(?:[.,]\d+)?)\b"),
+        re.compile(r"(\{?[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\}?)"),
+        re.compile(r"\b(0x[0-9a-fA-F]+)\b"),
+        re.compile(r"(?<![\w.])(\d{1,3}(?:\.\d{1,3}){3})(?![\w.])"),
+        re.compile(r"\w\[(\d+)\]"),
+        # Whole keywords only: "tid" must not match the end of EventID, whose value picks the answer
+        re.compile(r"(?i:\b(?:pid|port|tid|EventRecordID|RecordNumber|ProcessI[dD]|ThreadI[dD])\b)\W{1,3}(\d+)\b"),
+    ]
+    MASK = "<*>"
+    PERSIST_EVERY = 30  # seconds between writes of the persisted cache
+    REPORT_EVERY = 500  # lookups between hit-rate lines
+
+    def __init__(self, max_entries=10000, persist=False, file_name="result_cache.json"):
+        self.max_entries = max_entries
+        self.persist = persist
+        self._entries = OrderedDict()  # scope \x1f normalized line -> generalized response
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.uncacheable = 0
+        self._store = None
+        self._dirty = False
+        self._last_flush = time.time()
+        if persist:
+            self._store = ConfigsHandler(file_name=file_name)
+            try:
+                for k, v in (self._store.get_saved_paths() or {}).items():
+                    self._entries[k] = v
+            except Exception as e:
+                print(f"[result_cache] could not load {file_name}: {e}")
+            self._trim()
+
+    # ---------- normalization ----------
+    @classmethod
+    def normalize(cls, line):
+        """Return (normalized line, volatile values in line order)."""
+        spans = []
+        for pattern in cls.VOLATILE_PATTERNS:
+            for m in pattern.finditer(line):
+                s, e = m.span(1)
+                if not any(s < pe and ps < e for ps, pe in spans):
+                    spans.append((s, e))
+        spans.sort()
+        parts, values, last = [], [], 0
+        for s, e in spans:
+            parts.append(line[last:s])
+            parts.append(cls.MASK)
+            values.append(line[s:e])
+            last = e
+        parts.append(line[last:])
+        return "".join(parts).strip(), values
+
+    @classmethod
+    def _generalize(cls, response, values):
+        """Replace line values in the response with placeholders, or None if unsafe."""
+        by_value = {}
+        for i, v in enumerate(values):
+            by_value.setdefault(v, []).append(i)
+        out, last = [], 0
+        if by_value:
+            alternatives = "|".join(re.escape(v) for v in sorted(by_value, key=len, reverse=True))
+            for m in re.finditer(rf"(?<![\w.])(?:{alternatives})(?![\w]|\.\d)", response):
+                indexes = by_value[m.group(0)]
+                if len(indexes) > 1:
+                    return None  # same value at several positions: can't tell which one the model used
+                out.append(response[last:m.start()])
+                out.append(f"\x00{indexes[0]}\x00")
+                last = m.end()
+        out.append(response[last:])
+        generalized = "".join(out)
+        # A volatile token the line didn't contain was derived from one; don't cache it
+        if cls.normalize(re.sub(r"\x00\d+\x00", "", generalized))[1]:
+            return None
+        return generalized
+
+    # ---------- lookup / store ----------
+    def lookup(self, scope, line):
+        normalized, values = self.normalize(line)
+        key = f"{scope}\x1f{normalized}"
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+            else:
+                self._entries.move_to_end(key)
+                self.hits += 1
+            if (self.hits + self.misses) % self.REPORT_EVERY == 0:
+                print(f"[result_cache] hit rate {self.hits / (self.hits + self.misses):.1%} "
+                      f"({self.hits} hits, {self.misses} misses, {self.uncacheable} uncacheable, "
+                      f"{len(self._entries)} entries)")
+        if entry is None:
+            return None
+        try:
+            return re.sub(r"\x00(\d+)\x00", lambda m: values[int(m.group(1))], entry)
+        except IndexError:
+            return None
+
+    def store(self, scope, line, response):
+        normalized, values = self.normalize(line)
+        generalized = self._generalize(response, values)
+        with self._lock:
+            if generalized is None:
+                self.uncacheable += 1
+                return False
+            key = f"{scope}\x1f{normalized}"
+            self._entries[key] = generalized
+            self._entries.move_to_end(key)
+            self._trim()
+            self._dirty = True
+        if self.persist and time.time() - self._last_flush >= self.PERSIST_EVERY:
+            self.flush()
+        return True
+
+    def _trim(self):
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def flush(self):
+        if not self.persist or not self._dirty:
+            return
+        with self._lock:
+            snapshot = dict(self._entries)
+            self._dirty = False
+            self._last_flush = time.time()
+        try:
+            self._store.save_mapping(snapshot)
+        except Exception as e:
+            print(f"[result_cache] flush failed: {e}")
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+        self.flush()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "uncacheable": self.uncacheable,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            }
@@ -1,410 +1,896 @@
-# services_handler.py
-import threading
-import os
-import time
-from typing import Dict, Tuple, Optional, List
-from configs_handler import ConfigsHandler
-from llm_handler import LLMHandler
-from template_handler import TemplateHandler
-import json
-
-
-class ServicesHandler:
-    def __init__(self):
-        self._lock = threading.Lock()
-        self.active_services: Dict[str, Dict[str, object]] = {}
-        self.states_handler = ConfigsHandler(file_name="button_states.json")
-        self.paths_handler = ConfigsHandler()  # ../conf/saved_paths.txt
-        self.positions_handler = ConfigsHandler(file_name="positions.json")
-        self._filestats = {}  # key -> {"mtime": float, "size": int}
-        self._llm_lock = threading.Lock()
-        self._shared_llm = None
-        self.global_config_handler = ConfigsHandler(file_name="global_config.json")
-
-
-    def _key(self, file_path: str, template: str) -> str:
-        return f"{os.path.basename(file_path)}_{template}"
-
-    def _split_key(self, key: str) -> Tuple[str, str]:
-        # returns (basename, template)
-        parts = key.split("_", 1)
-        return (parts[0], parts[1] if len(parts) > 1 else "")
-
-    def _find_full_path(self, basename: str) -> Optional[str]:
-        candidates: List[str] = self.paths_handler.get_saved_paths()
-        for p in candidates:
-            if os.path.basename(p) == basename:
-                return p
-        return None
-
-    # ---------- CRUD from UI ----------
-    def create_service(self, file_path: str, template: str) -> bool:
-        print(f"[create] {self._key(file_path, template)}")
-        return True
-
-    def delete_service(self, file_path: str, template: str) -> bool:
-        key = self._key(file_path, template)
-        with self._lock:
-            if key in self.active_services:
-                self._stop_locked(key)
-        
-        # Clear position when service is deleted/disabled
-        pos = self.positions_handler.get_saved_paths() or {}
-        if key in pos:
-            pos.pop(key)
-            self.positions_handler.save_mapping(pos)
-            print(f"[delete] cleared position for {key}")
-        
-        print(f"[delete] {key}")
-        return True
-
-    def start_service(self, file_path: str, template: str, passthrough: bool) -> bool:
-        key = self._key(file_path, template)
-        with self._lock:
-            if key in self.active_services:
-                print(f"[start] already running: {key}")
-                return True
-            print(f"[TEMPLATE] {template}")
-            stop_flag = threading.Event()
-            t = threading.Thread(
-                target=self._monitor_loop,
-                args=(file_path, template, stop_flag, passthrough),
-                name=f"Monitor-{key}",
-                daemon=True,
-            )
-            self.active_services[key] = {"thread": t, "stop_flag": stop_flag}
-            t.start()
-        print(f"[start] {key}")
-        return True
-
-
-    def stop_service(self, file_path: str, template: str) -> bool:
-        key = self._key(file_path, template)
-        with self._lock:
-            if key not in self.active_services:
-                print(f"[stop] not running: {key}")
-                return True
-            self._stop_locked(key)
-        print(f"[stop] {key}")
-        return True
-
-    def _stop_locked(self, key: str) -> None:
-        entry = self.active_services.get(key)
-        if not entry:
-            return
-        entry["stop_flag"].set()
-        entry["thread"].join(timeout=5)
-        self.active_services.pop(key, None)
-
-    def stop_all(self) -> None:
-        with self._lock:
-            keys = list(self.active_services.keys())
-        for k in keys:
-            with self._lock:
-                self._stop_locked(k)
-        print("[stop_all] all services stopped")
-
-    # ---------- Auto-restore on app start ----------
-    def autostart_from_states(self) -> None:
-        """
-        Read ../conf/button_states.json and start services for entries
-        with {"enabled": true, "started": true}.
-        """
-        try:
-            states: Dict[str, Dict[str, bool]] = self.states_handler.get_saved_paths()
-        except Exception as ex:
-            print(f"[autostart] failed to read states: {ex}")
-            return
-
-        for key, st in (states or {}).items():
-            if not isinstance(st, dict):
-                continue
-            if not (st.get("enabled") and st.get("started")):
-                continue
-            basename, template = self._split_key(key)
-            full_path = self._find_full_path(basename)
-            if not full_path:
-                print(f"[autostart] path not found for {basename}, skip")
-                continue
-            print("Auto Starting..")
-            self.start_service(full_path, template, st.get("passthrough"))
-
-
-    def _calculate_max_tokens(self, prompt_length):
-        # More complex prompts need more output tokens
-        if prompt_length < 512:
-            return 128  # Simple extraction
-        elif prompt_length < 1024:
-            return 256  # Medium complexity
-        elif prompt_length < 2048:
-            return 512  # Medium complexity  
-        else:
-            return 512  # Maximum for "extract everything"
-
-
-    def _calculate_optimal_ctx(self, prompt_length, max_tokens):
-        # Use the actual calculated max_tokens, not a fixed buffer
-        needed_ctx = prompt_length + max_tokens
-        
-        # Round up to efficient context sizes
-        if needed_ctx <= 512:
-            return 512
-        elif needed_ctx <= 1024:
-            return 1024
-        elif needed_ctx <= 2048:
-            return 2048
-        else:
-            return 4096
-
-
-    def _llm_parser(self, logline: str, template_name: str):
-
-        try:
-            full_template_path=os.path.join("../templates",template_name)
-            #print(f"\n\n[PROSESSING]:\n\n{full_template_path} ON {logline}\n\n")
-            handler = TemplateHandler(full_template_path)
-            model_map_handler = ConfigsHandler(file_name="modelsmap.json")
-            model_name = model_map_handler.get_saved_paths().get(template_name, [None])[0]
-
-            # Check if log matches template type criteria
-            if handler.matches_log(logline):
-
-                global_config = self.global_config_handler.get_saved_paths()
-                max_size = global_config.get("max_log_size", 300) if global_config else 300
-                logline = logline[:max_size] 
-                
-                prompt = handler.get_prompt()
-                model_template = handler.get_model_template()
-                model_params = handler.get_model_params()
-                output_format = handler.get_output_format()    
-                constructed_prompt = f"{prompt}\nRAW_LOG: {logline}"
-                full_prompt = model_template.replace("{{ .Prompt }}", constructed_prompt)
-            
-                # Infer with sanitized log line
-                timeout_occurred = threading.Event()
-                
-                timeout_seconds = global_config.get("llm_timeout", 60) if global_config else 60
-                timer = threading.Timer(float(timeout_seconds), lambda: timeout_occurred.set())
-                try:
-                    prompt_len = len(full_prompt)
-                    optimal_max_tokens = self._calculate_max_tokens(prompt_len)
-                    optimal_ctx = self._calculate_optimal_ctx(prompt_len, optimal_max_tokens)
-                    
-                    with self._llm_lock:
-                        
-                        if self._shared_llm is None or self._shared_llm.n_ctx != optimal_ctx:
-                            gpu_enabled = global_config.get("gpu_acceleration", False) if global_config else False
-                            
-                            if gpu_enabled:
-                                gpu_ratio = global_config.get("gpu_offload_ratio", 1.0)
-                                
-                                if gpu_ratio >= 1.0:
-                                    gpu_layers = -1  # All layers
-                                else:
-                                    gpu_layers = max(1, int(gpu_ratio * 32))
-                            else:
-                                gpu_layers = 0
-
-                            self._shared_llm = LLMHandler(model_name=model_name, n_ctx=optimal_ctx, n_gpu_layers=gpu_layers)
-                        
-                        timer.start()
-                        response, latency = self._shared_llm.infer(full_prompt, model_params, max_tokens=optimal_max_tokens)
-                finally:
-                    timer.cancel()
-                #print(f"[LLM] {response}\n\nTime: {latency} sec")
-                if timeout_occurred.is_set():
-                    return "TIMEOUT", "LLM call timed out after 60 seconds"
-                
-                # Convert to SYSLOG format if needed
-                if output_format.upper() == "SYSLOG":
-                    formatted_response = handler.json_to_syslog(response)
-                    return formatted_response, latency
-                else:
-                    return response, latency
-        
-        except Exception as e:
-            #print(f"\n\n[ERROR]:\n\n{e}\n\n")
-            return "LLMERROR", f"\n\n[LLM ERROR]:\n\n{e}\n\n"
-
-    
-    def _monitor_loop(self, file_path: str, template: str, stop_flag: threading.Event, passthrough: bool):
-        
-        key = self._key(file_path, template)
-        model_map_handler = ConfigsHandler(file_name="modelsmap.json")
-
-        global_config = self.global_config_handler.get_saved_paths()
-        TAIL_LIMIT = global_config.get("tail_limit", 100) if global_config else 100
-        access_rate = global_config.get("file_access_rate", 5) if global_config else 5
-
-        # -------- helper: detect text file --------
-        def is_text_file(path, blocksize=512):
-            try:
-                with open(path, "rb") as f:
-                    chunk = f.read(blocksize)
-                chunk.decode("utf-8")
-                return True
-            except Exception:
-                return False
-        #--------------- JSON CHECKER -------
-
-        def is_valid_json(s):
-            try:
-                json.loads(s)
-                return True
-            except:
-                return False
-    
-        # -------- plain text logs --------
-        if is_text_file(file_path) and not file_path.lower().endswith(".evtx"):
-            pos = self.positions_handler.get_saved_paths() or {}
-            state = pos.get(key) or pos.get(template) or {}
-            last_pos = int(state.get("last_pos", 0))
-    
-            while not stop_flag.is_set():
-                try:
-                    with open(file_path, "r", encoding="utf-8", errors="ignore") as f:
-                        f.seek(last_pos)
-                        
-                        for line in f:
-                            if stop_flag.is_set():
-                                return
-                            if len(line) > 2:
-                                ################ PARSING LOGIC ################
-                                if not passthrough:
-                                    print(f"[text TO LLM][{key}] NEW line={line.strip()}")
-                                    response, latency= self._llm_parser(line, template)
-                                    is_json = is_valid_json(response)
-                                    if not is_json:
-                                        print(f"[FALLBACK] {line}\n\nTime: {latency} sec")
-                                    else:
-                                        print(f"[LLM] {response}\n\nTime: {latency} sec")
-                                else:
-                                    print(f"[text][{key}] NEW line={line.strip()}")
-                                ##############################################
-    
-                        last_pos = f.tell()
-                    pos[key] = {"last_pos": last_pos}
-                    self.positions_handler.save_mapping(pos)
-                except Exception as e:
-                    print(f"[text][{key}] error: {e}")
-                if stop_flag.wait(access_rate): break
-            return
-    
-        # -------- EVTX logs --------
-        from Evtx.Evtx import Evtx
-        from xml.etree import ElementTree as ET
-        from datetime import datetime
-    
-        ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
-    
-        def parse_iso(s: str | None):
-            if not s: return None
-            try:
-                return datetime.fromisoformat(s.replace("Z", "+00:00"))
-            except Exception:
-                return None
-    
-        # ---- load last position ----
-        pos = self.positions_handler.get_saved_paths() or {}
-        state = pos.get(key) or pos.get(template) or {}
-        last_id = int(state.get("last_id", 0))
-        last_ts = state.get("last_ts")
-        last_dt = parse_iso(last_ts)
-    
-        # ---- init once ----
-        if last_dt is None:
-            latest_dt, latest_id = None, 0
-            try:
-                with Evtx(file_path) as log:
-                    recs = sorted(log.records(), key=lambda r: r.timestamp())
-                    tail = recs[-TAIL_LIMIT:] if len(recs) > TAIL_LIMIT else recs
-                    for rec in tail:
-                        root = ET.fromstring(rec.xml())
-                        rid = int(root.findtext("./e:System/e:EventRecordID", namespaces=ns) or 0)
-                        tc = root.find("./e:System/e:TimeCreated", namespaces=ns)
-                        ts = tc.get("SystemTime") if tc is not None else None
-                        dt = parse_iso(ts)
-                        if dt is None:
-                            continue
-                        if latest_dt is None or dt > latest_dt or (dt == latest_dt and rid > latest_id):
-                            latest_dt, latest_id = dt, rid
-                last_dt, last_id = latest_dt, latest_id
-                last_ts = last_dt.isoformat() if last_dt else None
-                pos[key] = {"last_id": last_id, "last_ts": last_ts}
-                self.positions_handler.save_mapping(pos)
-                print(f"[evtx][{key}] init last_id={last_id} last_ts={last_ts}")
-            except Exception as e:
-                print(f"[evtx][{key}] init error: {e}")
-    
-        # ---- tail loop ----
-        while not stop_flag.is_set():
-            new_id, new_ts, new_dt = last_id, last_ts, last_dt
-            try:
-                if not os.path.exists(file_path):
-                    if stop_flag.wait(access_rate): break
-                    continue
-    
-                with Evtx(file_path) as log:
-                    recs = sorted(log.records(), key=lambda r: r.timestamp())
-                    tail = recs[-TAIL_LIMIT:] if len(recs) > TAIL_LIMIT else recs
-                    bong = 0
-                    for rec in tail:
-                        if stop_flag.is_set():
-                            return
-                        xml_str = rec.xml()
-                        root = ET.fromstring(xml_str)
-    
-                        rid = int(root.findtext("./e:System/e:EventRecordID", namespaces=ns) or 0)
-                        tcel = root.find("./e:System/e:TimeCreated", namespaces=ns)
-                        ts = tcel.get("SystemTime") if tcel is not None else None
-                        dt = parse_iso(ts)
-    
-                        is_new = False
-                        if last_dt is None and dt is not None:
-                            is_new = True
-                        elif dt is None and rid > last_id:
-                            is_new = True
-                        elif dt and last_dt and (dt > last_dt or (dt == last_dt and rid > last_id)):
-                            is_new = True
-    
-                        if not is_new:
-                            bong += 1
-                            continue
-    
-                        ################ PARSING LOGIC ################
-                        if not passthrough:
-                            print(f"[evtx TO LLM][{key}] NEW id={rid} ts={ts}")
-                            response, latency= self._llm_parser(xml_str, template)
-                            is_json = is_valid_json(response)
-                            if not is_json:
-                                print(f"[FALLBACK] {xml_str}\n\nTime: {latency} sec")
-                            else:
-                                print(f"[LLM] {response}\n\nTime: {latency} sec")
-                        else:
-                            print(f"[evtx passthrough][{key}] NEW id={rid} ts={ts}")
-                            
-                        ##############################################
-                        
-    
-                        if (new_dt is None and dt is not None) or \
-                        (dt and (dt > new_dt or (dt == new_dt and rid > new_id))):
-                            new_id, new_ts, new_dt = rid, ts, dt
-
-                        if new_id != last_id or new_ts != last_ts:
-                            last_id, last_ts, last_dt = new_id, new_ts, new_dt
-                            pos[key] = {"last_id": last_id, "last_ts": last_ts}
-                            self.positions_handler.save_mapping(pos)
-    
-            except Exception as e:
-                print(f"[evtx][{key}] error: {e}")
-
-    
-            if stop_flag.wait(access_rate): break
-
-
-
-
-# Global instance
-services_handler = ServicesHandler()
-
+# services_handler.py
+import threading
+import os
+import time
+import queue
+from typing import Dict, Tuple, Optional, List
+from configs_handler import ConfigsHandler
+from checkpoint_handler import CheckpointHandler
+from llm_handler import InferenceTimeout, InferenceCancelled
+from model_pool_handler import ModelPoolHandler
+from prefix_cache_handler import PrefixCacheHandler
+from batch_handler import BatchHandler
+from result_cache_handler import ResultCacheHandler
+from extractor_handler import ExtractorHandler
+from evtx_fields_handler import EvtxFieldsHandler
+from preprocess_handler import PreprocessHandler
+from file_watcher_handler import FileWatcherHandler
+from worker_pool_handler import WorkerPoolHandler
+from template_handler import TemplateHandler
+from template_registry_handler import template_registry
+import json
+
+
+class ServicesHandler:
+    PIPELINE_QUEUE_SIZE = 256  # records buffered per template before the file reader waits
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active_services: Dict[str, Dict[str, object]] = {}
+        self.states_handler = ConfigsHandler(file_name="button_states.json")
+        self.paths_handler = ConfigsHandler()  # ../conf/saved_paths.txt
+        self._filestats = {}  # key -> {"mtime": float, "size": int}
+        self._llm_lock = threading.Lock()
+        self.global_config_handler = ConfigsHandler(file_name="global_config.json")
+        global_config = self.global_config_handler.get_saved_paths() or {}
+        self.checkpoints = CheckpointHandler(flush_ms=global_config.get("checkpoint_flush_ms", 1000),
+                                             flush_records=global_config.get("checkpoint_flush_records", 100))
+        self.prefix_cache = PrefixCacheHandler(max_size_mb=global_config.get("prefix_cache_disk_mb", 2048))
+        self.model_pool = ModelPoolHandler(prefix_cache=self.prefix_cache)
+        self.batch_handler = BatchHandler(lambda key: self.model_pool.get(*key), lock=self._llm_lock)
+        self.worker_pool = WorkerPoolHandler()
+        self._prefix_tokens = {}  # (model_name, prompt prefix) -> token count
+        self.result_cache = ResultCacheHandler(max_entries=global_config.get("result_cache_size", 10000),
+                                               persist=global_config.get("result_cache_persist", False))
+        self.preprocessor = PreprocessHandler()
+        self.file_watcher = FileWatcherHandler(poll_interval=global_config.get("file_access_rate", 2))
+        self._readers: Dict[str, Dict[str, object]] = {}  # abs file path -> shared reader
+        self.extractors = ExtractorHandler(min_samples=global_config.get("extractor_min_samples", 3),
+                                           verify_every=global_config.get("extractor_verify_every", 50))
+        self.global_config_handler.subscribe(self._on_global_config)
+
+    def _on_global_config(self, global_config) -> None:
+        """Apply settings that running services read from their handlers, without a restart."""
+        global_config = global_config or {}
+        self.file_watcher.poll_interval = global_config.get("file_access_rate", 2)
+        self.result_cache.max_entries = global_config.get("result_cache_size", 10000)
+        self.extractors.min_samples = global_config.get("extractor_min_samples", 3)
+        self.extractors.verify_every = global_config.get("extractor_verify_every", 50)
+        self.checkpoints.flush_ms = global_config.get("checkpoint_flush_ms", 1000)
+        self.checkpoints.flush_records = global_config.get("checkpoint_flush_records", 100)
+        print("[config] global_config.json changed, settings reloaded")
+
+    def _key(self, file_path: str, template: str) -> str:
+        return f"{os.path.basename(file_path)}_{template}"
+
+    def _split_key(self, key: str) -> Tuple[str, str]:
+        # returns (basename, template)
+        parts = key.split("_", 1)
+        return (parts[0], parts[1] if len(parts) > 1 else "")
+
+    def _find_full_path(self, basename: str) -> Optional[str]:
+        candidates: List[str] = self.paths_handler.get_saved_paths()
+        for p in candidates:
+            if os.path.basename(p) == basename:
+                return p
+        return None
+
+    # ---------- CRUD from UI ----------
+    def create_service(self, file_path: str, template: str) -> bool:
+        print(f"[create] {self._key(file_path, template)}")
+        return True
+
+    def delete_service(self, file_path: str, template: str) -> bool:
+        key = self._key(file_path, template)
+        with self._lock:
+            if key in self.active_services:
+                self._stop_locked(key)
+        
+        # Clear position when service is deleted/disabled
+        if self.checkpoints.delete(key):
+            print(f"[delete] cleared position for {key}")
+        
+        print(f"[delete] {key}")
+        return True
+
+    def start_service(self, file_path: str, template: str, passthrough: bool) -> bool:
+        key = self._key(file_path, template)
+        with self._lock:
+            if key in self.active_services:
+                print(f"[start] already running: {key}")
+                return True
+            print(f"[TEMPLATE] {template}")
+            stop_flag = threading.Event()
+            records = queue.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+            t = threading.Thread(
+                target=self._pipeline_loop,
+                args=(key, template, records, stop_flag, passthrough),
+                name=f"Monitor-{key}",
+                daemon=True,
+            )
+            self.active_services[key] = {"thread": t, "stop_flag": stop_flag, "file_path": file_path,
+                                         "queue": records}
+            t.start()
+            self._attach_reader(file_path, key, template, records, stop_flag, passthrough)
+        print(f"[start] {key}")
+        return True
+
+
+    def stop_service(self, file_path: str, template: str) -> bool:
+        key = self._key(file_path, template)
+        with self._lock:
+            if key not in self.active_services:
+                print(f"[stop] not running: {key}")
+                return True
+            self._stop_locked(key)
+        print(f"[stop] {key}")
+        return True
+
+    def _signal_stop(self, entry) -> None:
+        entry["stop_flag"].set()
+        try:
+            entry["queue"].put_nowait(None)  # wake the pipeline if it is waiting for records
+        except queue.Full:
+            pass  # busy; it checks stop_flag before the next record
+
+    def _stop_locked(self, key: str) -> None:
+        entry = self.active_services.get(key)
+        if not entry:
+            return
+        self._signal_stop(entry)
+        if "backfill" in entry:
+            entry["backfill"].join(timeout=5)
+        else:
+            self._detach_reader(entry["file_path"], key)
+        entry["thread"].join(timeout=5)
+        self.active_services.pop(key, None)
+
+    def stop_all(self) -> None:
+        with self._lock:
+            keys = list(self.active_services.keys())
+            # Signal every service first so all in-flight generations abort together
+            for k in keys:
+                self._signal_stop(self.active_services[k])
+        for k in keys:
+            with self._lock:
+                self._stop_locked(k)
+        # No batch may start on, and no thread may still be inside, an instance being closed
+        self.batch_handler.stop()
+        with self._llm_lock:
+            self.model_pool.clear()
+        self.worker_pool.shutdown()
+        self.result_cache.flush()
+        self.checkpoints.flush()
+        print("[stop_all] all services stopped")
+
+    # ---------- EVTX backfill ----------
+    def _backfill_key(self, file_path: str, template: str) -> str:
+        return f"{self._key(file_path, template)}@backfill"
+
+    def is_backfill_running(self, file_path: str, template: str) -> bool:
+        entry = self.active_services.get(self._backfill_key(file_path, template))
+        return bool(entry) and entry["backfill"].is_alive()
+
+    def start_backfill(self, file_path: str, template: str, passthrough: bool = False) -> bool:
+        """Replay an archived .evtx through the template, resuming from its own checkpoint."""
+        key = self._backfill_key(file_path, template)
+        with self._lock:
+            if self.is_backfill_running(file_path, template):
+                print(f"[backfill] already running: {key}")
+                return True
+            self._stop_locked(key)  # finished run still registered
+            stop_flag = threading.Event()
+            records = queue.Queue(maxsize=self.PIPELINE_QUEUE_SIZE)
+            pipeline = threading.Thread(
+                target=self._pipeline_loop,
+                args=(key, template, records, stop_flag, passthrough),
+                name=f"Monitor-{key}",
+                daemon=True,
+            )
+            feeder = threading.Thread(
+                target=self._backfill_loop,
+                args=(key, file_path, records, stop_flag),
+                name=f"Backfill-{os.path.basename(file_path)}",
+                daemon=True,
+            )
+            self.active_services[key] = {"thread": pipeline, "stop_flag": stop_flag, "file_path": file_path,
+                                         "queue": records, "backfill": feeder}
+            pipeline.start()
+            feeder.start()
+        print(f"[backfill] {key}")
+        return True
+
+    def stop_backfill(self, file_path: str, template: str) -> bool:
+        key = self._backfill_key(file_path, template)
+        with self._lock:
+            self._stop_locked(key)
+        print(f"[backfill] stopped {key}")
+        return True
+
+    def _backfill_loop(self, key: str, file_path: str, records: queue.Queue, stop_flag: threading.Event):
+        from evtx_backfill_handler import EvtxBackfillHandler
+        from xml.etree import ElementTree as ET
+
+        ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
+        global_config = self.global_config_handler.get_saved_paths()
+        workers = global_config.get("backfill_workers", 2) if global_config else 2
+        sub = {"queue": records, "stop_flag": stop_flag}
+
+        state = self._load_position(key)
+        if state.get("done"):
+            print(f"[backfill][{key}] already complete up to #{state.get('last_id')}; delete its position to rerun")
+            self._dispatch(sub, None, stop_flag)
+            return
+        backfill = EvtxBackfillHandler(file_path, workers=workers)
+        last = {"last_id": int(state.get("last_id", 0)), "last_ts": state.get("last_ts")}
+        try:
+            for rid, xml_str in backfill.run(last["last_id"], stop_flag):
+                root = ET.fromstring(xml_str)
+                tcel = root.find("./e:System/e:TimeCreated", namespaces=ns)
+                ts = tcel.get("SystemTime") if tcel is not None else None
+                # The pipeline saves each checkpoint once the record is handled
+                last = {"last_id": rid, "last_ts": ts}
+                if not self._dispatch(sub, ("evtx", xml_str, root, rid, ts, last), stop_flag):
+                    return
+        except Exception as e:
+            print(f"[backfill][{key}] error: {e}")
+            return
+        if stop_flag.is_set():
+            return
+        self._dispatch(sub, ("pos", dict(last, done=True)), stop_flag)
+        self._dispatch(sub, None, stop_flag)  # pipeline exits after the last record
+
+    # ---------- Shared readers ----------
+    def _attach_reader(self, file_path: str, key: str, template: str, records: queue.Queue,
+                       stop_flag: threading.Event, passthrough: bool = False) -> None:
+        """Subscribe a template pipeline to the file's reader, starting the reader if it is the first."""
+        path = os.path.abspath(file_path)
+        reader = self._readers.get(path)
+        start = reader is None
+        if start:
+            reader = {"subs": {}, "lock": threading.Lock(), "stop_flag": threading.Event(),
+                      "changed": self.file_watcher.subscribe(path)}
+            reader["thread"] = threading.Thread(
+                target=self._reader_loop,
+                args=(file_path, reader),
+                name=f"Reader-{os.path.basename(file_path)}",
+                daemon=True,
+            )
+            self._readers[path] = reader
+        with reader["lock"]:
+            reader["subs"][key] = {"template": template, "queue": records, "stop_flag": stop_flag, "state": None,
+                                   "passthrough": passthrough}
+        reader["changed"].set()  # pick up the new subscriber on the next pass
+        if start:
+            reader["thread"].start()
+
+    def _detach_reader(self, file_path: str, key: str) -> None:
+        path = os.path.abspath(file_path)
+        reader = self._readers.get(path)
+        if reader is None:
+            return
+        with reader["lock"]:
+            reader["subs"].pop(key, None)
+            last = not reader["subs"]
+        if last:
+            reader["stop_flag"].set()
+            reader["changed"].set()
+            reader["thread"].join(timeout=5)
+            self.file_watcher.unsubscribe(path, reader["changed"])
+            self._readers.pop(path, None)
+
+    # ---------- Checkpoints ----------
+    def _load_position(self, key: str, template: Optional[str] = None) -> Dict[str, object]:
+        return self.checkpoints.get(key) or (self.checkpoints.get(template) if template else None) or {}
+
+    def _save_position(self, key: str, state: Dict[str, object]) -> None:
+        # Batched in memory; written to the checkpoint database every flush window
+        self.checkpoints.set(key, state)
+
+    @staticmethod
+    def _file_id(ident) -> Dict[str, object]:
+        # Part of a text checkpoint that tells the file apart from a rotated replacement
+        return {k: ident[k] for k in ("dev", "ino", "head", "head_len")}
+
+    # ---------- Auto-restore on app start ----------
+    def autostart_from_states(self) -> None:
+        """
+        Read ../conf/button_states.json and start services for entries
+        with {"enabled": true, "started": true}.
+        """
+        try:
+            states: Dict[str, Dict[str, bool]] = self.states_handler.get_saved_paths()
+        except Exception as ex:
+            print(f"[autostart] failed to read states: {ex}")
+            return
+
+        try:
+            self.prefix_cache.prune_stale(TemplateHandler.list_templates())
+        except Exception as ex:
+            print(f"[autostart] prefix cache prune failed: {ex}")
+
+        templates: List[str] = []
+        for key, st in (states or {}).items():
+            if not isinstance(st, dict):
+                continue
+            if not (st.get("enabled") and st.get("started")):
+                continue
+            basename, template = self._split_key(key)
+            full_path = self._find_full_path(basename)
+            if not full_path:
+                print(f"[autostart] path not found for {basename}, skip")
+                continue
+            print("Auto Starting..")
+            self.start_service(full_path, template, st.get("passthrough"))
+            if not st.get("passthrough") and template not in templates:
+                templates.append(template)
+
+        if templates:
+            threading.Thread(target=self._warm_prefixes, args=(templates,),
+                             name="PrefixWarmup", daemon=True).start()
+
+    def _warm_prefixes(self, templates: List[str]) -> None:
+        """
+        Put each autostarted template's prompt-prefix state into the model
+        instance its records will run on, from the disk cache when it has
+        the entry, so the first record after a restart doesn't evaluate it.
+        The context is sized for a max_log_size line; smaller prompts reuse it.
+        """
+        global_config = self.global_config_handler.get_saved_paths() or {}
+        if global_config.get("inference_workers", 0) > 0:
+            return  # worker processes hold their own instances
+        max_size = global_config.get("max_log_size", 300)
+        gpu_layers = self._gpu_layers(global_config)
+        for template_name in templates:
+            try:
+                handler = template_registry.get(template_name)
+                model_name = template_registry.model_for(template_name)
+                prefix, full_prompt = handler.build_prompt("")
+                if not prefix:
+                    continue
+                # A preprocessed line is at most max_log_size characters, so at most as many tokens
+                prompt_tokens = self._count_prompt_tokens(model_name, prefix, full_prompt) + max_size
+                n_ctx = self._calculate_optimal_ctx(prompt_tokens, self._calculate_max_tokens(prompt_tokens))
+                start = time.time()
+                with self._llm_lock:
+                    self.model_pool.ram_budget_mb = global_config.get("model_pool_ram_mb", 4096)
+                    llm = self.model_pool.get(model_name, n_ctx, gpu_layers)
+                    llm.warm_prefix(prefix, os.path.join("../templates", template_name))
+                print(f"[autostart] warmed prompt prefix of {template_name} "
+                      f"({model_name} ctx={n_ctx}) in {time.time() - start:.2f}s")
+            except Exception as ex:
+                print(f"[autostart] prefix warm-up for {template_name} failed: {ex}")
+
+
+    def _calculate_max_tokens(self, prompt_tokens):
+        # More complex prompts need more output tokens
+        if prompt_tokens < 128:
+            return 128  # Simple extraction
+        elif prompt_tokens < 256:
+            return 256  # Medium complexity
+        else:
+            return 512  # Maximum for "extract everything"
+
+
+    def _calculate_optimal_ctx(self, prompt_tokens, max_tokens):
+        # Use the actual calculated max_tokens, not a fixed buffer
+        needed_ctx = prompt_tokens + max_tokens
+        
+        # Round up to efficient context sizes
+        if needed_ctx <= 512:
+            return 512
+        elif needed_ctx <= 1024:
+            return 1024
+        elif needed_ctx <= 2048:
+            return 2048
+        else:
+            return 4096 * ((needed_ctx + 4095) // 4096)
+
+
+    def _count_prompt_tokens(self, model_name, prefix, full_prompt):
+        """Token count of the prompt; the template prefix is tokenized once per model."""
+        try:
+            tokenizer = self.model_pool.tokenizer(model_name)
+            key = (model_name, prefix)
+            prefix_tokens = self._prefix_tokens.get(key)
+            if prefix_tokens is None:
+                prefix_tokens = tokenizer.count_tokens(prefix, add_bos=True)
+                self._prefix_tokens[key] = prefix_tokens
+            return prefix_tokens + tokenizer.count_tokens(full_prompt[len(prefix):])
+        except Exception as e:
+            print(f"[tokens] falling back to character count: {e}")
+            return len(full_prompt)
+
+
+    def _count_tokens(self, model_name, text):
+        try:
+            return self.model_pool.tokenizer(model_name).count_tokens(text)
+        except Exception:
+            return len(text) // 4
+
+    def _gpu_layers(self, global_config) -> int:
+        gpu_enabled = global_config.get("gpu_acceleration", False) if global_config else False
+        if not gpu_enabled:
+            return 0
+        gpu_ratio = global_config.get("gpu_offload_ratio", 1.0)
+        if gpu_ratio >= 1.0:
+            return -1  # All layers
+        return max(1, int(gpu_ratio * 32))
+
+
+    def _llm_parser(self, logline: str, template_name: str, cancel_event: Optional[threading.Event] = None,
+                    evtx_root=None):
+
+        try:
+            full_template_path=os.path.join("../templates",template_name)
+            # Parsed once per template and reloaded on change; no file I/O per line
+            handler = template_registry.get(template_name)
+            model_name = template_registry.model_for(template_name)
+
+            # Check if log matches template type criteria
+            if handler.matches_log(logline):
+
+                global_config = self.global_config_handler.get_saved_paths()
+                max_size = global_config.get("max_log_size", 300) if global_config else 300
+                
+                model_params = handler.get_model_params()
+                if handler.get_stop_at_json():
+                    model_params = dict(model_params, stop_at_json=True)
+                speculative = handler.get_speculative()
+                if speculative:
+                    model_params = dict(model_params, speculative=speculative)
+                output_format = handler.get_output_format()    
+                json_output = output_format.upper() in ("JSON", "SYSLOG")
+                scope = f"{template_name}|{model_name}|{handler.mtime}"
+
+                # EVTX keys addressable in the parsed record skip the model; the
+                # LLM is only asked for the ones left over
+                keys = handler.get_json_keys() if evtx_root is not None and json_output else []
+                resolved, missing = EvtxFieldsHandler.resolve(evtx_root, keys) if keys else ({}, keys)
+
+                # Strip boilerplate and unrelated elements to fit max_log_size
+                raw_line = logline
+                logline = self.preprocessor.reduce(logline, missing or handler.get_json_keys(), max_size,
+                                                   handler.get_preprocess(), root=evtx_root)
+                if resolved and missing:
+                    prefix, full_prompt = handler.build_prompt(logline, keys=missing)
+                    grammar = handler.get_json_grammar(keys=missing)
+                    scope += "|" + ",".join(missing)
+                else:
+                    prefix, full_prompt = handler.build_prompt(logline)
+                    grammar = handler.get_json_grammar()
+
+                # Repeated event shapes are answered from the normalized-line cache
+                response = None
+                latency = 0.0
+                if keys and not missing:
+                    response = json.dumps(resolved)
+                elif self.result_cache.max_entries:
+                    response = self.result_cache.lookup(scope, logline)
+                if response is None and json_output:
+                    # Known log shapes are parsed by learned offsets instead of the model
+                    start = time.time()
+                    response = self.extractors.extract(template_name, scope, logline)
+                    latency = round(time.time() - start, 6)
+                if response is None:
+                    # Infer with sanitized log line; generation aborts between tokens
+                    # once the deadline passes or the service is stopped
+                    timeout_seconds = global_config.get("llm_timeout", 60) if global_config else 60
+                    deadline = time.time() + float(timeout_seconds)
+                    if logline != raw_line:
+                        self.preprocessor.record(template_name, self._count_tokens(model_name, raw_line),
+                                                 self._count_tokens(model_name, logline))
+                    try:
+                        prompt_tokens = self._count_prompt_tokens(model_name, prefix, full_prompt)
+                        optimal_max_tokens = self._calculate_max_tokens(prompt_tokens)
+                        optimal_ctx = self._calculate_optimal_ctx(prompt_tokens, optimal_max_tokens)
+                    
+                        batch_size = global_config.get("batch_max_size", 4) if global_config else 4
+                        n_workers = global_config.get("inference_workers", 0) if global_config else 0
+                        if n_workers > 0:
+                            # Out-of-process workers; a worker stuck past the deadline is killed
+                            self.worker_pool.ensure(n_workers, {
+                                "n_threads": global_config.get("threads_per_worker", 2),
+                                "ram_budget_mb": global_config.get("model_pool_ram_mb", 4096),  # per worker
+                                "prefix_cache_disk_mb": global_config.get("prefix_cache_disk_mb", 2048),
+                            })
+                            response, latency = self.worker_pool.submit(
+                                model_name, optimal_ctx, self._gpu_layers(global_config), full_prompt, model_params,
+                                optimal_max_tokens, prefix=prefix, prefix_source=full_template_path,
+                                grammar=grammar, deadline=deadline, cancel_event=cancel_event)
+                        elif batch_size > 1:
+                            # Hand the prompt to the batching worker; it takes _llm_lock per batch and
+                            # only then gets the instance from the pool, so it can't be evicted meanwhile
+                            self.model_pool.ram_budget_mb = global_config.get("model_pool_ram_mb", 4096) if global_config else 4096
+                            self.batch_handler.max_batch = batch_size
+                            self.batch_handler.max_wait_ms = global_config.get("batch_max_wait_ms", 20)
+                            model_key = (model_name, optimal_ctx, self._gpu_layers(global_config))
+                            response, latency = self.batch_handler.submit(model_key, full_prompt, model_params, optimal_max_tokens,
+                                                                          prefix=prefix, prefix_source=full_template_path,
+                                                                          grammar=grammar, deadline=deadline,
+                                                                          cancel_event=cancel_event)
+                        else:
+                            with self._llm_lock:
+                                self.model_pool.ram_budget_mb = global_config.get("model_pool_ram_mb", 4096) if global_config else 4096
+                                llm = self.model_pool.get(model_name, optimal_ctx, self._gpu_layers(global_config))
+                            
+                                response, latency = llm.infer(full_prompt, model_params, max_tokens=optimal_max_tokens,
+                                                           prefix=prefix, prefix_source=full_template_path,
+                                                           grammar=grammar, deadline=deadline, cancel_event=cancel_event)
+                    except InferenceTimeout:
+                        return "TIMEOUT", f"LLM call timed out after {timeout_seconds} seconds"
+                    except InferenceCancelled:
+                        return "CANCELLED", "LLM call cancelled because the service stopped"
+                    if json_output:
+                        self.extractors.learn(template_name, scope, logline, response)
+                    if self.result_cache.max_entries:
+                        cacheable = not json_output
+                        try:
+                            json.loads(response)
+                            cacheable = True
+                        except ValueError:
+                            pass
+                        if cacheable and response:
+                            self.result_cache.store(scope, logline, response)
+                if resolved and missing:
+                    try:
+                        data = json.loads(response)
+                        response = json.dumps({k: resolved[k] if k in resolved else data.get(k) for k in keys})
+                    except (ValueError, AttributeError):
+                        pass  # not JSON; left to the fallback path
+                #print(f"[LLM] {response}\n\nTime: {latency} sec")
+                
+                # Convert to SYSLOG format if needed
+                if output_format.upper() == "SYSLOG":
+                    formatted_response = handler.json_to_syslog(response)
+                    return formatted_response, latency
+                else:
+                    return response, latency
+            else:
+                return "NOMATCH", 0.0
+        
+        except Exception as e:
+            #print(f"\n\n[ERROR]:\n\n{e}\n\n")
+            return "LLMERROR", f"\n\n[LLM ERROR]:\n\n{e}\n\n"
+
+    
+    def _pipeline_loop(self, key: str, template: str, records: queue.Queue, stop_flag: threading.Event,
+                       passthrough: bool):
+        """Per-template consumer of the shared reader's records; owns the template's checkpoint."""
+
+        #--------------- JSON CHECKER -------
+        def is_valid_json(s):
+            try:
+                json.loads(s)
+                return True
+            except:
+                return False
+
+        while not stop_flag.is_set():
+            item = records.get()
+            if item is None or stop_flag.is_set():
+                return
+            try:
+                kind = item[0]
+                if kind == "pos":
+                    self._save_position(key, item[1])
+                    continue
+
+                ################ PARSING LOGIC ################
+                if kind == "line":
+                    _, line = item
+                    if not passthrough:
+                        print(f"[text TO LLM][{key}] NEW line={line.strip()}")
+                        response, latency= self._llm_parser(line, template, stop_flag)
+                        if response == "CANCELLED":
+                            return
+                        is_json = is_valid_json(response)
+                        if response == "NOMATCH":
+                            print(f"[text][{key}] line does not match {template}, skipped")
+                        elif not is_json:
+                            print(f"[FALLBACK] {line}\n\nTime: {latency} sec")
+                        else:
+                            print(f"[LLM] {response}\n\nTime: {latency} sec")
+                    else:
+                        print(f"[text][{key}] NEW line={line.strip()}")
+                elif kind == "evtx":
+                    _, xml_str, root, rid, ts, checkpoint = item
+                    if not passthrough:
+                        print(f"[evtx TO LLM][{key}] NEW id={rid} ts={ts}")
+                        response, latency= self._llm_parser(xml_str, template, stop_flag, evtx_root=root)
+                        if response == "CANCELLED":
+                            return
+                        is_json = is_valid_json(response)
+                        if response == "NOMATCH":
+                            print(f"[evtx][{key}] id={rid} does not match {template}, skipped")
+                        elif not is_json:
+                            print(f"[FALLBACK] {xml_str}\n\nTime: {latency} sec")
+                        else:
+                            print(f"[LLM] {response}\n\nTime: {latency} sec")
+                    else:
+                        print(f"[evtx passthrough][{key}] NEW id={rid} ts={ts}")
+                    self._save_position(key, checkpoint)
+                ##############################################
+            except Exception as e:
+                print(f"[pipeline][{key}] error: {e}")
+
+    def _subscribers(self, reader) -> List[Tuple[str, Dict[str, object]]]:
+        with reader["lock"]:
+            return [(k, sub) for k, sub in reader["subs"].items() if not sub["stop_flag"].is_set()]
+
+    @staticmethod
+    def _dispatch(sub, item, reader_stop: threading.Event) -> bool:
+        """Queue a record for one template; False if that pipeline or the reader is stopping."""
+        while True:
+            try:
+                sub["queue"].put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                if sub["stop_flag"].is_set() or reader_stop.is_set():
+                    return False
+
+    def _reader_loop(self, file_path: str, reader):
+        """
+        One reader per physical file: each line / EVTX record is read and
+        decoded once and queued to every subscribed template pipeline that
+        has not seen it yet, judged by that template's own checkpoint.
+        """
+        name = os.path.basename(file_path)
+        stop_flag = reader["stop_flag"]
+
+        def read_settings():
+            # Read on every pass so edits apply to running readers; only a stat unless the file changed
+            global_config = self.global_config_handler.get_saved_paths()
+            tail_limit = global_config.get("tail_limit", 100) if global_config else 100
+            access_rate = global_config.get("file_access_rate", 5) if global_config else 5
+            return tail_limit, access_rate
+
+        def wait_for_change(timeout):
+            # True when the reader is stopping
+            return self.file_watcher.wait(reader["changed"], stop_flag, timeout)
+
+        # -------- helper: detect text file --------
+        def is_text_file(path, blocksize=512):
+            try:
+                with open(path, "rb") as f:
+                    chunk = f.read(blocksize)
+                chunk.decode("utf-8")
+                return True
+            except Exception:
+                return False
+    
+        def line_filter(sub):
+            # (template, required bytes); None template when it can't be loaded: the pipeline reports it
+            if sub["passthrough"]:
+                return None, None
+            try:
+                return template_registry.get(sub["template"]), template_registry.required_bytes(sub["template"])
+            except Exception as e:
+                print(f"[text][{name}] template {sub['template']}: {e}")
+                return None, None
+
+        # -------- plain text logs --------
+        if is_text_file(file_path) and not file_path.lower().endswith(".evtx"):
+            from text_tail_handler import TextTailHandler
+
+            tail = TextTailHandler(file_path)
+            last_size, grown_at = -1, time.time()
+            ident = None  # identity of the file the offsets refer to
+
+            def feed(source, filters, final):
+                # Queue the lines of `source` past each template's offset; False once the reader stops
+                offset = min(sub["state"] for _, sub, _, _ in filters)
+                for base, buf, end in source.chunks(offset, stop_flag, final):
+                    decoded = {}  # line end -> text, shared by the templates
+                    for key, sub, handler, literal in filters:
+                        if sub["state"] < base:
+                            continue  # its pipeline stopped taking lines in an earlier chunk
+                        start = sub["state"] - base  # skip lines this template is past
+                        # Lines without the template's fixed literal are skipped undecoded
+                        for stop, raw in source.lines(buf, end, start, literal):
+                            if stop_flag.is_set():
+                                return False
+                            line = decoded.get(stop)
+                            if line is None:
+                                line = decoded[stop] = raw.decode("utf-8", errors="ignore")
+                            if len(line) > 2 and (handler is None or handler.matches_log(line)):
+                                if not self._dispatch(sub, ("line", line), stop_flag):
+                                    break
+                            sub["state"] = base + stop
+                        else:
+                            sub["state"] = max(sub["state"], base + end)
+                return not stop_flag.is_set()
+
+            def drain(rotated, old, filters):
+                # Finish the rotated file, then start the new one from its first byte
+                print(f"[text][{name}] rotated to {os.path.basename(rotated)}, finishing it first")
+                if not feed(TextTailHandler(rotated), filters, final=True):
+                    return False
+                for key, sub, _, _ in filters:
+                    # Saved against the old file, so a restart mid-way doesn't read it twice
+                    if self._dispatch(sub, ("pos", dict(self._file_id(old), last_pos=sub["state"])), stop_flag):
+                        sub["state"], sub["saved"] = 0, None
+                return True
+
+            while not stop_flag.is_set():
+                _, access_rate = read_settings()
+                try:
+                    subs = self._subscribers(reader)
+                    cur = tail.identity()
+                    if cur is None:
+                        # Missing for now, e.g. between rename and create: keep ident and offsets
+                        # as they are and compare identities once the path is back
+                        subs = []
+                    for key, sub in subs:
+                        if sub["state"] is None:
+                            state = self._load_position(key, sub["template"])
+                            sub["state"] = sub["saved"] = int(state.get("last_pos", 0))
+                            if "ino" in state and not tail.same_file(state, cur):
+                                # Rotated while this template was stopped
+                                rotated = tail.find_rotated(state, sub["state"])
+                                sub["saved"] = None
+                                if rotated is None or drain(rotated, state, [(key, sub) + line_filter(sub)]):
+                                    sub["state"] = 0
+                            elif sub["state"] > cur["size"]:
+                                sub["state"], sub["saved"] = 0, None  # truncated while stopped
+                    if subs:
+                        filters = [(key, sub) + line_filter(sub) for key, sub in subs]
+                        if ident is not None and (not tail.same_file(ident, cur)
+                                                  or cur["size"] < max(sub["state"] for _, sub in subs)):
+                            # Renamed away and recreated, or truncated (copytruncate)
+                            rotated = tail.find_rotated(ident, min(sub["state"] for _, sub in subs))
+                            if rotated and not drain(rotated, ident, filters):
+                                break
+                            for key, sub in subs:
+                                sub["state"], sub["saved"] = 0, None
+                            print(f"[text][{name}] following the new file")
+                        ident = cur
+                    if subs:
+                        # An unterminated last line is only taken once the file stopped growing
+                        if cur["size"] != last_size:
+                            last_size, grown_at = cur["size"], time.time()
+                        final = bool(tail.pending) and time.time() - grown_at >= access_rate
+                        if not feed(tail, filters, final):
+                            return
+                        # Checkpoints move once the pipeline has handled everything before them
+                        for key, sub in subs:
+                            if sub["state"] != sub["saved"] and self._dispatch(
+                                    sub, ("pos", dict(self._file_id(cur), last_pos=sub["state"])), stop_flag):
+                                sub["saved"] = sub["state"]
+                except Exception as e:
+                    print(f"[text][{name}] error: {e}")
+                if wait_for_change(access_rate if tail.pending else self.file_watcher.SAFETY_INTERVAL): break
+            return
+
+        # -------- EVTX logs --------
+        from evtx_tail_handler import EvtxTailHandler
+        from xml.etree import ElementTree as ET
+        from datetime import datetime
+    
+        ns = {"e": "http://schemas.microsoft.com/win/2004/08/events/event"}
+        tail = EvtxTailHandler(file_path)
+    
+        def parse_iso(s: str | None):
+            if not s: return None
+            try:
+                return datetime.fromisoformat(s.replace("Z", "+00:00"))
+            except Exception:
+                return None
+
+        def render(rec):
+            xml_str = tail.render(rec)
+            root = ET.fromstring(xml_str)
+            tcel = root.find("./e:System/e:TimeCreated", namespaces=ns)
+            ts = tcel.get("SystemTime") if tcel is not None else None
+            return xml_str, root, ts
+
+        def init_subscribers(subs):
+            # ---- load last position; templates without one start at the newest record ----
+            fresh = []
+            for key, sub in subs:
+                if sub["state"] is None:
+                    state = self._load_position(key, sub["template"])
+                    last_ts = state.get("last_ts")
+                    sub["state"] = {"last_id": int(state.get("last_id", 0)), "last_ts": last_ts,
+                                    "last_dt": tail.naive(parse_iso(last_ts))}
+                    if sub["state"]["last_dt"] is None:
+                        fresh.append((key, sub))
+            if not fresh:
+                return
+            latest_dt, latest_id = None, 0
+            try:
+                with tail.open():
+                    for rec in tail.records_after(tail.newest_id - 1, 1):
+                        latest_id, latest_dt = rec.record_num(), rec.timestamp()
+                last_ts = latest_dt.isoformat() if latest_dt else None
+                latest_dt = tail.naive(latest_dt)
+                for key, sub in fresh:
+                    sub["state"] = {"last_id": latest_id, "last_ts": last_ts, "last_dt": latest_dt}
+                    self._save_position(key, {"last_id": latest_id, "last_ts": last_ts})
+                    print(f"[evtx][{key}] init last_id={latest_id} last_ts={last_ts}")
+            except Exception as e:
+                print(f"[evtx][{name}] init error: {e}")
+    
+        # ---- tail loop ----
+        # Without inotify, Windows may update an EVTX file's mtime lazily, so
+        # keep re-reading it every file_access_rate seconds as well
+        while not stop_flag.is_set():
+            tail_limit, access_rate = read_settings()
+            evtx_wait = self.file_watcher.SAFETY_INTERVAL if self.file_watcher.native else access_rate
+            try:
+                if not os.path.exists(file_path):
+                    if wait_for_change(evtx_wait): break
+                    continue
+
+                subs = self._subscribers(reader)
+                init_subscribers(subs)
+                if subs:
+                    with tail.open():
+                        for key, sub in subs:
+                            if sub["state"]["last_id"] > tail.newest_id:
+                                # Record numbers went backwards: the log was cleared or replaced
+                                print(f"[evtx][{key}] log restarted at record {tail.newest_id}, "
+                                      f"following timestamps after {sub['state']['last_ts']}")
+                                sub["state"]["last_id"] = 0
+                        after_id = min(sub["state"]["last_id"] for _, sub in subs)
+                        after_dts = [sub["state"]["last_dt"] for _, sub in subs]
+                        after_ts = min(after_dts) if after_id == 0 and None not in after_dts else None
+
+                        filters = {key: line_filter(sub)[0] for key, sub in subs}
+                        # Only chunks past the oldest checkpoint are walked; records are
+                        # classified from their headers and rendered once, if anyone wants them
+                        for rec in tail.records_after(after_id, tail_limit, after_ts):
+                            if stop_flag.is_set():
+                                return
+                            rid, dt = rec.record_num(), tail.naive(rec.timestamp())
+                            wanted = []
+                            for key, sub in subs:
+                                st = sub["state"]
+                                if st["last_id"]:
+                                    is_new = rid > st["last_id"]
+                                else:
+                                    is_new = st["last_dt"] is None or dt > st["last_dt"]
+                                if is_new:
+                                    wanted.append((key, sub))
+                            if not wanted:
+                                continue
+                            xml_str, root, ts = render(rec)
+                            for key, sub in wanted:
+                                checkpoint = {"last_id": rid, "last_ts": ts}
+                                handler = filters[key]
+                                if handler is not None and not handler.matches_log(xml_str):
+                                    sub["skipped"] = checkpoint  # not this template's event type
+                                elif self._dispatch(sub, ("evtx", xml_str, root, rid, ts, checkpoint), stop_flag):
+                                    sub["skipped"] = None
+                                else:
+                                    continue
+                                sub["state"] = {"last_id": rid, "last_ts": ts, "last_dt": dt}
+
+                        # Move checkpoints past records a template skipped, behind its queued ones
+                        for key, sub in subs:
+                            if sub.get("skipped") and self._dispatch(sub, ("pos", sub["skipped"]), stop_flag):
+                                sub["skipped"] = None
+    
+            except Exception as e:
+                print(f"[evtx][{name}] error: {e}")
+
+    
+            if wait_for_change(evtx_wait): break
+
+
+
+
+# Global instance, built on first use: spawned inference / backfill workers
+# re-import the main module and must not start services of their own
+_services_handler = None
+_services_handler_lock = threading.Lock()
+
+
+def get_services_handler() -> ServicesHandler:
+    global _services_handler
+    with _services_handler_lock:
+        if _services_handler is None:
+            _services_handler = ServicesHandler()
+        return _services_handler
+
 #last_10 = [record.xml() for record in sorted(log.records(), key=lambda r: r.timestamp())[-10:]]
\ No newline at end of file
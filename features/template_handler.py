@@ -1,164 +1,246 @@
-import os
-import re
-import yaml
-
-class TemplateHandler:
-    TEMPLATE_DIR = "../templates"
-
-    def __init__(self, template_path=None):
-        self.template = None
-        self.template_path = template_path
-        if template_path:
-            self.template = self._load_template(template_path)
-
-    def _load_template(self, path):
-        with open(path, 'r') as f:
-            return yaml.safe_load(f)
-
-    def get_prompt(self):
-        return self.template.get("prompt", "").strip() if self.template else ""
-    
-    def get_model_params(self):
-        return self.template.get("model_params", {}) if self.template else {}
-    
-    def get_model_template(self):
-        return self.template.get("model_template", "").strip() if self.template else ""
-
-    def get_output_format(self):
-        return self.template.get("output_format", "JSON").strip() if self.template else "JSON"
-
-    def get_name(self):
-        return self.template.get("name", "Unnamed") if self.template else "Unnamed"
-
-    def get_type_regex(self):
-        return self.template.get("type_regex", "") if self.template else ""
-
-    def get_types(self):
-        return self.template.get("types", []) if self.template else []
-
-    def get_path(self):
-        return self.template_path
-
-    @classmethod
-    def list_templates(cls):
-        return [
-            os.path.join(cls.TEMPLATE_DIR, f)
-            for f in os.listdir(cls.TEMPLATE_DIR)
-            if f.endswith(".yaml") or f.endswith(".yml")
-        ]
-
-
-    def json_to_syslog(self, json_response):
-        """Convert JSON response to RFC3164 syslog format"""
-        import json
-        from datetime import datetime
-        import socket
-        
-        try:
-            # Parse JSON response
-            data = json.loads(json_response)
-            
-            # Current timestamp in RFC3164 format
-            timestamp = datetime.now().strftime("%b %d %H:%M:%S")
-            
-            # Get hostname
-            hostname = socket.gethostname()
-            
-            # Facility 16 (local0), Severity 6 (info) = Priority 134
-            priority = "<134>"
-            
-            # Create TAG from EventID if available
-            tag = f"EventID{data.get('EventID', 'Unknown')}"
-            
-            # Flatten JSON to key=value pairs
-            content_parts = []
-            for key, value in data.items():
-                if value:  # Skip empty values
-                    content_parts.append(f"{key}={value}")
-            
-            content = " ".join(content_parts)
-            
-            # RFC3164 format: <PRI>TIMESTAMP HOSTNAME TAG: CONTENT
-            syslog_message = f"{priority}{timestamp} {hostname} {tag}: {content}"
-            
-            return syslog_message
-            
-        except json.JSONDecodeError:
-            # If JSON parsing fails, return original response
-            return json_response
-
- 
-    def matches_log(self, log_line):
-        """Check if log matches template's type criteria"""
-        type_regex = self.get_type_regex()
-        types_list = self.get_types()
-        
-        # If no regex or types defined, accept any log
-        if not type_regex and not types_list:
-            return True
-            
-        # If no regex defined but types exist, skip matching
-        if not type_regex:
-            return False
-            
-        # Try to extract type from log using regex
-        match = re.search(type_regex, log_line)
-        if not match:
-            return False
-            
-        # Get the extracted type (first capture group)
-        extracted_type = match.group(1)
-        
-        # Check if extracted type is in accepted types list
-        return extracted_type in types_list
-    
-    def get_match_info(self, log_line):
-        """Get detailed match information for debugging"""
-        type_regex = self.get_type_regex()
-        types_list = self.get_types()
-        
-        info = {
-            'has_regex': bool(type_regex),
-            'has_types': bool(types_list),
-            'extracted_type': None,
-            'matches': False
-        }
-        
-        if type_regex:
-            match = re.search(type_regex, log_line)
-            if match:
-                info['extracted_type'] = match.group(1)
-                info['matches'] = info['extracted_type'] in types_list if types_list else False
-        
-        return info
-
-
-    @classmethod
-    def detect_template(cls, log_line, preferred_order=None):
-        if preferred_order is None:
-            preferred_order = ["JSON"]  # default fallback
-    
-        matched_templates = []
-    
-        for path in cls.list_templates():
-            with open(path, 'r') as f:
-                data = yaml.safe_load(f)
-                pattern = data.get("type_regex", "")
-                accepted_types = data.get("types", [])
-                output_format = data.get("output_format", "JSON").upper()
-    
-                if pattern:
-                    match = re.search(pattern, log_line)
-                    if match:
-                        extracted_type = match.group(1)
-                        if extracted_type in accepted_types:
-                            matched_templates.append((output_format, path))
-    
-        if matched_templates:
-            matched_templates.sort(
-                key=lambda t: preferred_order.index(t[0]) if t[0] in preferred_order else len(preferred_order)
-            )
-            return TemplateHandler(matched_templates[0][1])
-    
-        return None
-
+import os
+import re
+import yaml
+
+class TemplateHandler:
+    TEMPLATE_DIR = "../templates"
+
+    # Shared GBNF rules for flat JSON objects with scalar values
+    JSON_VALUE_GRAMMAR = r'''
+value  ::= string | number | "null" | "true" | "false"
+string ::= "\"" ( [^"\\\x7F\x00-\x1F] | "\\" ["\\/bfnrt] | "\\u" [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F] [0-9a-fA-F] )* "\""
+number ::= "-"? [0-9]+ ("." [0-9]+)?
+ws     ::= [ \t\n]? [ \t\n]?
+'''
+
+    def __init__(self, template_path=None):
+        self.template = None
+        self.template_path = template_path
+        self.mtime = None
+        if template_path:
+            self.mtime = os.path.getmtime(template_path)
+            self.template = self._load_template(template_path)
+        self._compile()
+
+    def _load_template(self, path):
+        with open(path, 'r') as f:
+            return yaml.safe_load(f)
+
+    def _compile(self):
+        # Derived once per load: matching and prompt building run for every log line
+        type_regex = self.get_type_regex()
+        self._type_re = re.compile(type_regex) if type_regex else None
+        self._types = set(self.get_types())
+        self._json_keys = self._parse_json_keys()
+        self._prompts = {}  # tuple(keys) or None -> (prompt, prefix, model template)
+
+    def get_prompt(self):
+        return self.template.get("prompt", "").strip() if self.template else ""
+    
+    def get_model_params(self):
+        return self.template.get("model_params", {}) if self.template else {}
+    
+    def get_model_template(self):
+        return self.template.get("model_template", "").strip() if self.template else ""
+
+    def get_output_format(self):
+        return self.template.get("output_format", "JSON").strip() if self.template else "JSON"
+
+    def get_name(self):
+        return self.template.get("name", "Unnamed") if self.template else "Unnamed"
+
+    def get_type_regex(self):
+        return self.template.get("type_regex", "") if self.template else ""
+
+    def get_types(self):
+        return self.template.get("types", []) if self.template else []
+
+    def get_path(self):
+        return self.template_path
+
+    def get_json_keys(self):
+        """Keys the template asks for: explicit `json_keys`, else the list after 'keys:' in the prompt."""
+        return list(self._json_keys)
+
+    def _parse_json_keys(self):
+        if not self.template:
+            return []
+        if self.template.get("json_keys"):
+            return [str(k) for k in self.template["json_keys"]]
+        text = self.template.get("prompt") or self.template.get("instruction") or ""
+        match = re.search(r"keys\s*:\s*(.+?)(?:\.(?:\s|$)|\n|$)", text)
+        if not match:
+            return []
+        keys = [k.strip().rstrip(".") for k in match.group(1).split(",")]
+        return [k for k in keys if re.fullmatch(r"[\w.\-]+", k)]
+
+    def get_json_grammar(self, keys=None):
+        """
+        GBNF grammar for the JSON object this template expects, or None when
+        the output is not JSON based or `json_grammar: false` is set.
+        With known keys (or the given subset) the object must list exactly
+        those keys in order.
+        """
+        if not self.template or self.template.get("json_grammar") is False:
+            return None
+        if self.get_output_format().upper() not in ("JSON", "SYSLOG"):
+            return None
+        keys = keys or self.get_json_keys()
+        if keys:
+            members = ' "," ws '.join(f'"\\"{k}\\"" ws ":" ws value' for k in keys)
+            root = f'root   ::= "{{" ws {members} ws "}}"'
+        else:
+            root = 'root   ::= "{" ws ( member ( "," ws member )* )? ws "}"\nmember ::= string ws ":" ws value'
+        return root + self.JSON_VALUE_GRAMMAR
+
+    def get_stop_at_json(self):
+        """Stop decoding once the JSON object closes; on for JSON/SYSLOG unless `stop_at_json: false`."""
+        if not self.template or self.template.get("stop_at_json") is False:
+            return False
+        return self.get_output_format().upper() in ("JSON", "SYSLOG")
+
+    def get_speculative(self):
+        """
+        Speculative decoding settings from the template's `speculative` key:
+        "prompt_lookup", "draft_model" or a mapping with `mode`,
+        `num_pred_tokens`, `max_ngram_size` and `draft_model` (a .gguf next
+        to the main model). None when absent or `off`.
+        """
+        spec = self.template.get("speculative") if self.template else None
+        if isinstance(spec, str):
+            spec = {"mode": spec}
+        if not isinstance(spec, dict) or spec.get("mode", "prompt_lookup") in ("off", False):
+            return None
+        return dict({"mode": "prompt_lookup"}, **spec)
+
+    def get_preprocess(self):
+        """RAW_LOG preprocessing mode: "xml" (default), "kv" or "off"."""
+        mode = self.template.get("preprocess", "xml") if self.template else "xml"
+        return "off" if mode is False else str(mode).lower()
+
+    def get_prompt_for_keys(self, keys):
+        """The prompt asking only for `keys` instead of the template's full key list."""
+        prompt = self.get_prompt()
+        match = re.search(r"keys\s*:\s*(.+?)(?:\.(?:\s|$)|\n|$)", prompt)
+        if match:
+            return prompt[:match.start(1)] + ", ".join(keys) + prompt[match.end(1):]
+        return f"{prompt}\nReturn only JSON with keys: {', '.join(keys)}."
+
+    def get_prompt_prefix(self, prompt=None):
+        """Static part of the rendered prompt that precedes the log line."""
+        model_template = self.get_model_template()
+        if "{{ .Prompt }}" not in model_template:
+            return ""
+        prompt = self.get_prompt() if prompt is None else prompt
+        return model_template.split("{{ .Prompt }}", 1)[0] + f"{prompt}\nRAW_LOG:"
+
+    def build_prompt(self, log_line, keys=None):
+        """Return (prefix, full_prompt) for a log line; `keys` narrows the requested keys."""
+        cache_key = tuple(keys) if keys else None
+        cached = self._prompts.get(cache_key)
+        if cached is None:
+            prompt = self.get_prompt_for_keys(keys) if keys else self.get_prompt()
+            cached = self._prompts[cache_key] = (prompt, self.get_prompt_prefix(prompt), self.get_model_template())
+        prompt, prefix, model_template = cached
+        constructed_prompt = f"{prompt}\nRAW_LOG: {log_line}"
+        full_prompt = model_template.replace("{{ .Prompt }}", constructed_prompt)
+        return prefix, full_prompt
+
+    @classmethod
+    def list_templates(cls):
+        return [
+            os.path.join(cls.TEMPLATE_DIR, f)
+            for f in os.listdir(cls.TEMPLATE_DIR)
+            if f.endswith(".yaml") or f.endswith(".yml")
+        ]
+
+
+    def json_to_syslog(self, json_response):
+        """Convert JSON response to RFC3164 syslog format"""
+        import json
+        from datetime import datetime
+        import socket
+        
+        try:
+            # Parse JSON response
+            data = json.loads(json_response)
+            
+            # Current timestamp in RFC3164 format
+            timestamp = datetime.now().strftime("%b %d %H:%M:%S")
+            
+            # Get hostname
+            hostname = socket.gethostname()
+            
+            # Facility 16 (local0), Severity 6 (info) = Priority 134
+            priority = "<134>"
+            
+            # Create TAG from EventID if available
+            tag = f"EventID{data.get('EventID', 'Unknown')}"
+            
+            # Flatten JSON to key=value pairs
+            content_parts = []
+            for key, value in data.items():
+                if value:  # Skip empty values
+                    content_parts.append(f"{key}={value}")
+            
+            content = " ".join(content_parts)
+            
+            # RFC3164 format: <PRI>TIMESTAMP HOSTNAME TAG: CONTENT
+            syslog_message = f"{priority}{timestamp} {hostname} {tag}: {content}"
+            
+            return syslog_message
+            
+        except json.JSONDecodeError:
+            # If JSON parsing fails, return original response
+            return json_response
+
+ 
+    def matches_log(self, log_line):
+        """Check if log matches template's type criteria"""
+        # If no regex or types defined, accept any log
+        if self._type_re is None and not self._types:
+            return True
+            
+        # If no regex defined but types exist, skip matching
+        if self._type_re is None:
+            return False
+            
+        # Try to extract type from log using regex
+        match = self._type_re.search(log_line)
+        if not match:
+            return False
+            
+        # Get the extracted type (first capture group)
+        extracted_type = match.group(1)
+        
+        # Check if extracted type is in accepted types list
+        return extracted_type in self._types
+    
+    def get_match_info(self, log_line):
+        """Get detailed match information for debugging"""
+        type_regex = self.get_type_regex()
+        types_list = self.get_types()
+        
+        info = {
+            'has_regex': bool(type_regex),
+            'has_types': bool(types_list),
+            'extracted_type': None,
+            'matches': False
+        }
+        
+        if type_regex:
+            match = self._type_re.search(log_line)
+            if match:
+                info['extracted_type'] = match.group(1)
+                info['matches'] = info['extracted_type'] in types_list if types_list else False
+        
+        return info
+
+
+    @classmethod
+    def detect_template(cls, log_line, preferred_order=None):
+        """Matching template with the most preferred output format, via the shared dispatch index."""
+        from template_registry_handler import template_registry
+        if preferred_order is None:
+            preferred_order = ["JSON"]  # default fallback
+        return template_registry.detect(log_line, preferred_order)
@@ -0,0 +1,225 @@
+import os
+import re
+import time
+import threading
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+from configs_handler import ConfigsHandler
+from template_handler import TemplateHandler
+
+
+class TemplateDispatchIndex:
+    """
+    Matches a log line against every template's type_regex in one step.
+    Templates sharing a regex are evaluated once, with a type -> templates
+    table instead of a scan. Regexes that need a fixed literal (e.g.
+    "<EventID") are only run when one pass of a literal scanner found it in
+    the line; the rest are folded into one combined regex of lookaheads
+    that reports each one's leftmost type capture.
+    """
+
+    MIN_LITERAL = 3
+
+    def __init__(self, templates):
+        # templates: [(path, TemplateHandler)] in listing order
+        self.order = {path: i for i, (path, _) in enumerate(templates)}
+        self.formats = {}
+        groups = {}
+        for path, handler in templates:
+            if handler._type_re is None:
+                continue
+            self.formats[path] = handler.get_output_format().upper()
+            group = groups.setdefault(handler.get_type_regex(), {"re": handler._type_re, "types": {}})
+            for t in handler.get_types():
+                group["types"].setdefault(t, []).append(path)
+        self.groups = list(groups.values())
+
+        by_literal, always = {}, []
+        for group in self.groups:
+            literal = self._required_literal(group["re"])
+            if literal:
+                by_literal.setdefault(literal, []).append(group)
+            else:
+                always.append(group)
+        self.by_literal = by_literal
+        # Lookahead keeps overlapping hits; longest-first reports the longest literal at each
+        # position, and `covers` adds the shorter literals that are its prefixes
+        literals = sorted(by_literal, key=len, reverse=True)
+        self.scanner = re.compile("(?=(" + "|".join(map(re.escape, literals)) + "))") if literals else None
+        self.covers = {lit: [o for o in literals if lit.startswith(o)] for lit in literals}
+        self.always, self.combined, self.combined_groups = always, None, []
+        if len(always) > 1:
+            self._build_combined(always)
+        self._pref_cache = {}
+
+    @classmethod
+    def _required_literal(cls, compiled):
+        """Longest literal every match must contain, or None."""
+        if compiled.flags & re.IGNORECASE:
+            return None
+        try:
+            parsed = sre_parse.parse(compiled.pattern)
+        except Exception:
+            return None
+        runs, run = [], []
+
+        def walk(items):
+            for op, av in items:
+                if op is sre_parse.LITERAL:
+                    run.append(chr(av))
+                    continue
+                if run:
+                    runs.append("".join(run))
+                    run.clear()
+                if op is sre_parse.SUBPATTERN and not (av[1] & re.IGNORECASE):
+                    walk(av[3])
+                    if run:
+                        runs.append("".join(run))
+                        run.clear()
+
+        walk(parsed)
+        if run:
+            runs.append("".join(run))
+        best = max(runs, key=len, default="")
+        return best if len(best) >= cls.MIN_LITERAL else None
+
+    def _build_combined(self, groups):
+        parts, index = [], 1
+        for i, group in enumerate(groups):
+            parts.append(f"(?=(?s:.*?)(?P<t{i}>{group['re'].pattern}))?")
+            self.combined_groups.append(index + 1)  # the template's own group 1
+            index += 1 + group["re"].groups
+        try:
+            self.combined = re.compile("".join(parts))
+        except re.error:
+            self.combined, self.combined_groups = None, []  # backreferences, global flags...
+            return
+        if self.combined.groups != index - 1:
+            self.combined, self.combined_groups = None, []
+
+    def match(self, log_line):
+        """[(template path, extracted type)] for every template accepting the line, in listing order."""
+        hits = []
+
+        def accept(group, extracted):
+            for path in group["types"].get(extracted, ()):
+                hits.append((path, extracted))
+
+        if self.scanner is not None:
+            seen = set()
+            for m in self.scanner.finditer(log_line):
+                seen.update(self.covers[m.group(1)])
+            for literal in seen:
+                for group in self.by_literal[literal]:
+                    m = group["re"].search(log_line)
+                    if m:
+                        accept(group, m.group(1))
+        if self.combined is not None:
+            m = self.combined.match(log_line)
+            for group, idx in zip(self.always, self.combined_groups):
+                if m.group(idx) is not None:
+                    accept(group, m.group(idx))
+        else:
+            for group in self.always:
+                m = group["re"].search(log_line)
+                if m:
+                    accept(group, m.group(1))
+        hits.sort(key=lambda h: self.order[h[0]])
+        return hits
+
+    def candidates(self, log_line, preferred_order):
+        """Matching (path, extracted type) sorted by output format preference."""
+        prefs = tuple(preferred_order)
+        rank = self._pref_cache.get(prefs)
+        if rank is None:
+            rank = self._pref_cache[prefs] = {
+                path: prefs.index(fmt) if fmt in prefs else len(prefs) for path, fmt in self.formats.items()}
+        return sorted(self.match(log_line), key=lambda h: rank[h[0]])
+
+
+class TemplateRegistryHandler:
+    """
+    Process-wide cache of loaded templates. Each YAML is parsed and compiled
+    once (type_regex, prompt strings) and reloaded only when its mtime
+    changes; mtimes are re-checked at most every `check_interval` seconds,
+    so the per-line path does no file I/O. The template -> model map comes
+    from ConfigsHandler's cached copy of modelsmap.json.
+    """
+
+    def __init__(self, template_dir=TemplateHandler.TEMPLATE_DIR, check_interval=2.0):
+        self.template_dir = template_dir
+        self.check_interval = check_interval
+        self.models_handler = ConfigsHandler(file_name="modelsmap.json")
+        self._lock = threading.Lock()
+        self._entries = {}  # file path -> {"mtime", "checked", "value"}
+        self.loads = 0
+        self._index = None
+        self._index_key = None
+        self._index_checked = 0.0
+
+    def _cached(self, path, load):
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and now - entry["checked"] < self.check_interval:
+                return entry["value"]
+        mtime = os.path.getmtime(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry and entry["mtime"] == mtime:
+                entry["checked"] = now
+                return entry["value"]
+        value = load(path)
+        with self._lock:
+            self._entries[path] = {"mtime": mtime, "checked": now, "value": value}
+            self.loads += 1
+        if entry:
+            print(f"[templates] reloaded {os.path.basename(path)}")
+        return value
+
+    def get(self, template_name):
+        """TemplateHandler for a file under the templates directory."""
+        return self._cached(os.path.join(self.template_dir, template_name), TemplateHandler)
+
+    def model_for(self, template_name):
+        """Model assigned to the template in modelsmap.json, or None."""
+        models = self.models_handler.get_saved_paths()
+        return (models.get(template_name) or [None])[0]
+
+    def required_bytes(self, template_name):
+        """UTF-8 literal that every line the template accepts contains, or None if there is none."""
+        handler = self.get(template_name)
+        if handler._type_re is None:
+            return None
+        literal = TemplateDispatchIndex._required_literal(handler._type_re)
+        return literal.encode("utf-8") if literal else None
+
+    def dispatch_index(self):
+        """TemplateDispatchIndex over all templates, rebuilt when one is added, removed or changed."""
+        now = time.time()
+        if self._index is not None and now - self._index_checked < self.check_interval:
+            return self._index
+        templates = []
+        for path in TemplateHandler.list_templates():
+            try:
+                templates.append((path, self._cached(path, TemplateHandler)))
+            except Exception as e:
+                print(f"[templates] skipping {os.path.basename(path)}: {e}")
+        key = [(path, id(handler)) for path, handler in templates]
+        with self._lock:
+            if key != self._index_key:
+                self._index = TemplateDispatchIndex(templates)
+                self._index_key = key
+            self._index_checked = now
+            return self._index
+
+    def detect(self, log_line, preferred_order):
+        """Best matching TemplateHandler for the line by format preference, or None."""
+        hits = self.dispatch_index().candidates(log_line, preferred_order)
+        return self._cached(hits[0][0], TemplateHandler) if hits else None
+
+
+# Global instance
+template_registry = TemplateRegistryHandler()
@@ -0,0 +1,144 @@
+import io
+import os
+import stat
+import hashlib
+
+
+class TextTailHandler:
+    """
+    Bulk reader for appended text logs. The file is read in large binary
+    chunks from a byte offset and split into lines by C-level iteration;
+    when a line must contain a fixed literal, bytes.find jumps straight
+    between its occurrences, so only those lines are sliced out and
+    decoded. An unterminated last line is carried over to the next read
+    and, at EOF, held back until it is completed, so checkpoints are
+    always exact line boundaries.
+
+    A file is identified by (device, inode, hash of its first bytes), so a
+    checkpoint can tell the file it was taken on from a replacement at the
+    same path (logrotate create) or the same file truncated (copytruncate),
+    and find_rotated() locates the old content to finish reading it.
+    """
+
+    CHUNK_SIZE = 1 << 20
+    HEAD_BYTES = 1024
+    COMPRESSED = (".gz", ".bz2", ".xz", ".zip", ".zst")
+
+    def __init__(self, file_path, chunk_size=CHUNK_SIZE):
+        self.file_path = file_path
+        self.chunk_size = chunk_size
+        self.pending = 0  # bytes of an unterminated line left at EOF by the last pass
+
+    def chunks(self, offset, stop_flag=None, final=False):
+        """
+        Yield (base, buffer, end) from file offset `offset` on: buffer[:end]
+        holds complete lines and starts at file offset `base`. With
+        final=True an unterminated last line is yielded as well.
+        """
+        self.pending = 0
+        with open(self.file_path, "rb") as f:
+            f.seek(offset)
+            carry, base = b"", offset
+            while stop_flag is None or not stop_flag.is_set():
+                chunk = f.read(self.chunk_size)
+                if not chunk:
+                    break
+                buf = carry + chunk if carry else chunk
+                end = buf.rfind(b"\n") + 1
+                if end:
+                    yield base, buf, end
+                carry = buf[end:]
+                base += end
+            if carry and final:
+                yield base, carry, len(carry)
+                carry = b""
+            self.pending = len(carry)
+
+    @staticmethod
+    def lines(buf, end, start=0, literal=None):
+        """
+        (stop, raw line) for each line in buf[start:end], newline included,
+        `stop` being its end in the buffer. With `literal`, only the lines
+        containing it, found without visiting the others.
+        """
+        if literal is None:
+            for raw in io.BytesIO(memoryview(buf)[start:end]):
+                start += len(raw)
+                yield start, raw
+            return
+        find = buf.find
+        while start < end:
+            hit = find(literal, start, end)
+            if hit < 0:
+                return
+            line_start = buf.rfind(b"\n", start, hit) + 1 or start
+            stop = find(b"\n", hit, end) + 1 or end
+            yield stop, buf[line_start:stop]
+            start = stop
+
+    # ---------- identity / rotation ----------
+    @staticmethod
+    def _hash(data):
+        return hashlib.sha1(data).hexdigest()
+
+    def identity(self, path=None):
+        """{"dev", "ino", "size", "head", "head_len"} of the file, or None if it is missing."""
+        try:
+            with open(path or self.file_path, "rb") as f:
+                st = os.fstat(f.fileno())
+                head = f.read(self.HEAD_BYTES)
+        except OSError:
+            return None
+        return {"dev": st.st_dev, "ino": st.st_ino, "size": st.st_size,
+                "head": self._hash(head), "head_len": len(head)}
+
+    def _head_matches(self, ident, path):
+        try:
+            with open(path, "rb") as f:
+                head = f.read(ident["head_len"])
+        except OSError:
+            return False
+        return len(head) == ident["head_len"] and self._hash(head) == ident["head"]
+
+    def same_file(self, ident, cur):
+        """True if `cur` (an identity()) is still the file `ident` was taken from, not replaced or truncated."""
+        if cur is None:
+            return False
+        if cur["ino"] and (cur["dev"], cur["ino"]) != (ident["dev"], ident["ino"]):
+            return False
+        if cur["head_len"] == ident["head_len"]:
+            return cur["head"] == ident["head"]
+        return self._head_matches(ident, self.file_path)
+
+    def find_rotated(self, ident, min_size=0):
+        """
+        Sibling file now holding the content `ident` was taken from: the
+        renamed file itself (same inode) or a copytruncate copy (same head,
+        at least min_size bytes). Compressed rotations can't be read; None
+        when there is no such file.
+        """
+        directory = os.path.dirname(os.path.abspath(self.file_path))
+        base = os.path.basename(self.file_path)
+        stem = os.path.splitext(base)[0]
+        candidates = []
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return None
+        for name in names:
+            if name == base or not name.startswith(stem) or name.lower().endswith(self.COMPRESSED):
+                continue
+            path = os.path.join(directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if stat.S_ISREG(st.st_mode):
+                candidates.append((st.st_mtime, path, st))
+        copies = []
+        for _, path, st in sorted(candidates, reverse=True):  # newest rotation first
+            if ident["ino"] and (st.st_dev, st.st_ino) == (ident["dev"], ident["ino"]):
+                return path
+            if st.st_size >= min_size and self._head_matches(ident, path):
+                copies.append(path)
+        return copies[0] if copies else None
@@ -0,0 +1,241 @@
+import time
+import queue
+import itertools
+import threading
+import multiprocessing
+from collections import OrderedDict
+from llm_handler import InferenceTimeout, InferenceCancelled
+
+
+class _CancelProbe:
+    """Event-like view of the worker's shared cancel slot for one request id."""
+
+    def __init__(self, slot, req_id):
+        self._slot = slot
+        self._req_id = req_id
+
+    def is_set(self):
+        return self._slot.value == self._req_id
+
+
+def _worker_main(task_queue, result_queue, settings, cancel_slot):
+    """Inference worker process: owns its own model pool and serves tasks until it gets None."""
+    from model_pool_handler import ModelPoolHandler
+    from prefix_cache_handler import PrefixCacheHandler
+
+    pool = ModelPoolHandler(
+        ram_budget_mb=settings["ram_budget_mb"],
+        n_threads=settings["n_threads"],
+        prefix_cache=PrefixCacheHandler(max_size_mb=settings["prefix_cache_disk_mb"]),
+    )
+    while True:
+        task = task_queue.get()
+        if task is None:
+            break
+        try:
+            llm = pool.get(task["model_name"], task["n_ctx"], task["n_gpu_layers"])
+            result = llm.infer(
+                task["prompt"], task["model_params"], task["max_tokens"],
+                prefix=task["prefix"], prefix_source=task["prefix_source"], grammar=task["grammar"],
+                deadline=task["deadline"], cancel_event=_CancelProbe(cancel_slot, task["id"]),
+            )
+            result_queue.put((task["id"], True, result))
+        except Exception as e:
+            result_queue.put((task["id"], False, (type(e).__name__, str(e))))
+    pool.clear()
+
+
+class WorkerPoolHandler:
+    """
+    Runs inference in N spawned processes, each with its own ModelPoolHandler
+    and thread share, so generations run in parallel and a stuck or crashed
+    worker cannot block the UI process. Each worker has its own task queue;
+    requests go to the least busy worker, preferring one that already has
+    the model loaded. A worker that dies, or whose current request exceeds
+    its timeout, is replaced and its queued requests are handed to the new
+    process. Deadlines and cancellation are enforced inside the worker
+    between tokens; killing the process is only the backstop.
+    """
+
+    KILL_GRACE = 5  # seconds past the deadline before a worker counts as stuck
+    POLL_INTERVAL = 1.0  # seconds between worker liveness checks
+
+    def __init__(self):
+        self._mp = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._lifecycle = threading.Lock()  # held across ensure()'s check, teardown and spawn
+        self._workers = []
+        self._pending = {}  # request id -> entry
+        self._ids = itertools.count(1)
+        self._result_queue = None
+        self._collector = None
+        self._collector_stop = None  # stop Event of the current collector thread
+        self._settings = None
+        self._running = False
+        self.restarts = 0
+
+    # ---------- lifecycle ----------
+    def ensure(self, n_workers, settings):
+        # Monitors call this together on their first line; only the first may (re)start the pool
+        with self._lifecycle:
+            with self._lock:
+                if self._running and len(self._workers) == n_workers and self._settings == settings:
+                    return
+            self._shutdown()
+            with self._lock:
+                self._settings = dict(settings)
+                self._result_queue = self._mp.Queue()
+                self._workers = [self._spawn(i) for i in range(n_workers)]
+                self._running = True
+                self._collector_stop = threading.Event()
+                self._collector = threading.Thread(target=self._collect, args=(self._result_queue, self._collector_stop),
+                                                   name="WorkerPool-collector", daemon=True)
+                self._collector.start()
+        print(f"[workers] started {n_workers} inference workers ({settings['n_threads']} threads each)")
+
+    def _spawn(self, idx):
+        tasks = self._mp.Queue()
+        cancel_slot = self._mp.Value("q", 0, lock=False)  # request id the worker should abort
+        proc = self._mp.Process(
+            target=_worker_main,
+            args=(tasks, self._result_queue, self._settings, cancel_slot),
+            name=f"LLMWorker-{idx}",
+            daemon=True,
+        )
+        proc.start()
+        return {"idx": idx, "process": proc, "tasks": tasks, "cancel": cancel_slot,
+                "inflight": OrderedDict(), "models": set()}
+
+    def shutdown(self):
+        with self._lifecycle:
+            self._shutdown()
+
+    def _shutdown(self):
+        with self._lock:
+            if not self._running:
+                return
+            self._running = False
+            self._collector_stop.set()
+            collector, self._collector = self._collector, None
+            workers, self._workers = self._workers, []
+            for w in workers:
+                w["tasks"].put(None)
+        for w in workers:
+            w["process"].join(timeout=2)
+            if w["process"].is_alive():
+                w["process"].terminate()
+        if collector is not threading.current_thread():
+            collector.join(timeout=self.POLL_INTERVAL * 2)
+        with self._lock:
+            for entry in self._pending.values():
+                self._finish(entry, False, "worker pool shut down")
+            self._pending.clear()
+        print("[workers] stopped")
+
+    # ---------- requests ----------
+    def _pick_worker(self, model_name):
+        return min(self._workers, key=lambda w: (len(w["inflight"]), model_name not in w["models"]))
+
+    def _finish(self, entry, ok, result):
+        entry["ok"], entry["result"] = ok, result
+        entry["done"].set()
+
+    def submit(self, model_name, n_ctx, n_gpu_layers, prompt, model_params=None, max_tokens=64,
+               prefix=None, prefix_source=None, grammar=None, deadline=None, cancel_event=None):
+        req_id = next(self._ids)
+        task = {
+            "id": req_id, "model_name": model_name, "n_ctx": n_ctx, "n_gpu_layers": n_gpu_layers,
+            "prompt": prompt, "model_params": model_params, "max_tokens": max_tokens,
+            "prefix": prefix, "prefix_source": prefix_source, "grammar": grammar, "deadline": deadline,
+        }
+        entry = {"task": task, "done": threading.Event(), "ok": False, "result": None}
+        with self._lock:
+            if not self._running:
+                raise Exception("worker pool is not running")
+            worker = self._pick_worker(model_name)
+            worker["inflight"][req_id] = entry
+            worker["models"].add(model_name)
+            self._pending[req_id] = entry
+            worker["tasks"].put(task)
+
+        cancel_sent = False
+        while not entry["done"].wait(0.1):
+            if cancel_event is not None and cancel_event.is_set() and not cancel_sent:
+                with self._lock:
+                    worker = self._worker_of(req_id)
+                    if worker is not None:
+                        worker["cancel"].value = req_id
+                cancel_sent = True
+            if deadline is not None and time.time() > deadline + self.KILL_GRACE:
+                with self._lock:
+                    worker = self._worker_of(req_id)
+                    if worker is not None:
+                        self._replace(worker, failed_id=req_id, reason="stuck past its deadline")
+                    self._pending.pop(req_id, None)
+                raise InferenceTimeout("inference worker stuck past its deadline")
+        if not entry["ok"]:
+            kind, message = entry["result"] if isinstance(entry["result"], tuple) else ("Exception", entry["result"])
+            raise {"InferenceTimeout": InferenceTimeout, "InferenceCancelled": InferenceCancelled}.get(kind, Exception)(message)
+        return entry["result"]
+
+    def _worker_of(self, req_id):
+        return next((w for w in self._workers if req_id in w["inflight"]), None)
+
+    def _replace(self, worker, failed_id, reason):
+        """Kill a worker, fail the request it was running and requeue the rest on a fresh process."""
+        worker["process"].terminate()
+        worker["process"].join(timeout=2)
+        inflight = worker["inflight"]
+        fresh = self._spawn(worker["idx"])
+        self._workers[self._workers.index(worker)] = fresh
+        self.restarts += 1
+        requeued = len(inflight) - (1 if failed_id in inflight else 0)
+        print(f"[workers] worker {worker['idx']} {reason}; restarted ({requeued} requeued)")
+        for req_id, entry in inflight.items():
+            if req_id == failed_id:
+                self._pending.pop(req_id, None)
+                self._finish(entry, False, f"inference worker {reason}")
+                continue
+            fresh["inflight"][req_id] = entry
+            fresh["models"].add(entry["task"]["model_name"])
+            fresh["tasks"].put(entry["task"])
+
+    def _collect(self, result_queue, stop):
+        # One collector per pool start; it only reads the queue it was started with
+        next_check = time.time() + self.POLL_INTERVAL
+        while not stop.is_set():
+            try:
+                req_id, ok, result = result_queue.get(timeout=self.POLL_INTERVAL)
+            except queue.Empty:
+                req_id = None
+            except (EOFError, OSError):
+                break
+            if req_id is not None:
+                with self._lock:
+                    entry = self._pending.pop(req_id, None)
+                    for w in self._workers:
+                        w["inflight"].pop(req_id, None)
+                if entry is not None:
+                    self._finish(entry, ok, result)
+            # Checked on time, not only when results stop coming
+            if time.time() >= next_check:
+                self._check_workers(stop)
+                next_check = time.time() + self.POLL_INTERVAL
+
+    def _check_workers(self, stop):
+        with self._lock:
+            if stop.is_set():
+                return
+            for w in list(self._workers):
+                if not w["process"].is_alive():
+                    # Requests run in queue order, so the oldest one is what crashed it
+                    oldest = next(iter(w["inflight"]), None)
+                    self._replace(w, failed_id=oldest, reason=f"exited with code {w['process'].exitcode}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": len(self._workers),
+                "inflight": [len(w["inflight"]) for w in self._workers],
+                "restarts": self.restarts,
+            }
@@ -0,0 +1,54 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "features"))
+
+llama_cpp = pytest.importorskip("llama_cpp")
+
+from llm_handler import LLMHandler
+
+# Any GGUF works; the test only looks at which positions get decoded
+MODEL = os.environ.get("LOGEM_TEST_MODEL", os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        "..", "..", "models", "logem-win.gguf"))
+PREFIX = "Extract fields from the log and return only JSON with keys: User, Host, Port.\nRAW_LOG:"
+
+
+def decoded_positions(monkeypatch):
+    """Record (seq_id, pos) of every token the batch context decodes."""
+    seen = []
+    decode = llama_cpp.llama_decode
+
+    def counting(ctx, batch):
+        seen.extend((batch.seq_id[j][0], batch.pos[j]) for j in range(batch.n_tokens))
+        return decode(ctx, batch)
+
+    monkeypatch.setattr(llama_cpp, "llama_decode", counting)
+    return seen
+
+
+@pytest.mark.skipif(not os.path.isfile(MODEL), reason="set LOGEM_TEST_MODEL to a GGUF model")
+def test_batch_does_not_reevaluate_prefix(monkeypatch):
+    llm = LLMHandler(os.path.basename(MODEL), model_dir=os.path.dirname(MODEL), n_ctx=512, n_gpu_layers=0)
+    llm.load_model()
+    n_prefix = len(llm.model.tokenize(PREFIX.encode("utf-8"), add_bos=True, special=True))
+
+    def requests(*lines):
+        return [(f"{PREFIX} {line}", {"temperature": 0}, 4, None, None, None, PREFIX, None) for line in lines]
+
+    seen = decoded_positions(monkeypatch)
+    results = llm.infer_batch(requests("sshd accepted bob from 10.0.0.1 port 22",
+                                       "sshd accepted eve from 10.0.0.2 port 2222"))
+    assert not any(isinstance(r, Exception) for r in results)
+    # Evaluated once, in seq 0; seq 1 starts from a copy
+    assert sorted(p for s, p in seen if p < n_prefix and s == 0) == list(range(n_prefix))
+    assert not [p for s, p in seen if p < n_prefix and s != 0]
+
+    seen.clear()
+    llm.infer_batch(requests("sshd accepted amy from 10.0.0.3 port 22",
+                             "sshd failed joe from 10.0.0.4 port 22"))
+    # Same prefix in the next batch: still held in seq 0
+    assert not [p for _, p in seen if p < n_prefix]
+    assert llm.prefix_misses == 1 and llm.prefix_hits == 3
+    llm.close()
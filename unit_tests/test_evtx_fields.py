@@ -0,0 +1,34 @@
+import os
+import sys
+from xml.etree import ElementTree as ET
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "features"))
+
+from evtx_fields_handler import EvtxFieldsHandler
+
+RECORD = ET.fromstring(
+    '<Event xmlns="http://schemas.microsoft.com/win/2004/08/events/event"><System>'
+    '<Provider Name="Microsoft-Windows-Security-Auditing"/><EventID>4624</EventID><Level>0</Level>'
+    '<Keywords>0x8020000000000000</Keywords><EventRecordID>1001</EventRecordID>'
+    '<Execution ProcessID="612" ThreadID="700"/><Computer>DC01</Computer></System>'
+    '<EventData><Data Name="LogonType">2</Data><Data Name="TargetUserName">bob</Data></EventData></Event>')
+
+
+def test_numeric_system_fields_are_ints():
+    found, missing = EvtxFieldsHandler.resolve(RECORD, ["EventID", "Level", "EventRecordID", "ProcessID", "ThreadID"])
+    assert missing == []
+    assert found == {"EventID": 4624, "Level": 0, "EventRecordID": 1001, "ProcessID": 612, "ThreadID": 700}
+
+
+def test_other_fields_stay_strings():
+    found, missing = EvtxFieldsHandler.resolve(RECORD, ["Keywords", "Computer", "Provider", "LogonType", "TargetUserName"])
+    assert missing == []
+    assert found == {"Keywords": "0x8020000000000000", "Computer": "DC01",
+                     "Provider": "Microsoft-Windows-Security-Auditing", "LogonType": "2", "TargetUserName": "bob"}
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name} ok")
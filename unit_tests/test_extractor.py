@@ -0,0 +1,42 @@
+import os
+import sys
+import json
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "features"))
+
+from extractor_handler import ExtractorHandler
+
+TEMPLATE = "generic_template.yaml"
+SCOPE = "generic_template.yaml|model|1"
+
+
+def line(n):
+    return f"Oct 11 10:00:{n:02d} host sshd[{4000 + n}]: Accepted password for user{n} from 10.0.0.{n} port 22"
+
+
+def answer(n, **extra):
+    return json.dumps(dict({"User": f"user{n}", "ProcessID": 4000 + n, "Status": None, "Success": True}, **extra))
+
+
+def test_null_and_bool_fields_compile():
+    ex = ExtractorHandler(min_samples=3, verify_every=0)
+    # The second line generalizes the cluster template; min_samples count from there
+    for n in range(1, 5):
+        assert ex.extract(TEMPLATE, SCOPE, line(n)) is None
+        ex.learn(TEMPLATE, SCOPE, line(n), answer(n))
+    assert json.loads(ex.extract(TEMPLATE, SCOPE, line(7))) == json.loads(answer(7))
+    assert ex.stats()[TEMPLATE]["bypassed"] == 1
+
+
+def test_nested_values_are_not_learned():
+    ex = ExtractorHandler(min_samples=3, verify_every=0)
+    for n in range(1, 5):
+        ex.learn(TEMPLATE, SCOPE, line(n), answer(n, Tags=["ssh"]))
+    assert ex.extract(TEMPLATE, SCOPE, line(7)) is None
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name} ok")
@@ -0,0 +1,44 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "features"))
+
+from result_cache_handler import ResultCacheHandler
+
+SCOPE = "spp_events.yaml|model|1"
+LOGON = ("<Event><System><EventID>4624</EventID><EventRecordID>1001</EventRecordID>"
+         "<Execution ProcessID=\"612\" ThreadID=\"700\"/></System></Event>")
+RESPONSE = '{"EventID": 4624, "Action": "logon", "RecordID": 1001}'
+
+
+def test_event_id_is_not_volatile():
+    normalized, values = ResultCacheHandler.normalize(LOGON)
+    assert "<EventID>4624</EventID>" in normalized
+    assert "4624" not in values
+    assert "1001" in values and "612" in values and "700" in values
+
+
+def test_keywords_match_whole_words_only():
+    for line in ("Report 42 generated", "support: 17 tickets", "EventID: 4634"):
+        assert ResultCacheHandler.normalize(line)[1] == [], line
+    assert ResultCacheHandler.normalize("sshd pid=4242 port 22")[1] == ["4242", "22"]
+
+
+def test_other_event_id_misses():
+    cache = ResultCacheHandler(max_entries=10)
+    assert cache.store(SCOPE, LOGON, RESPONSE)
+    assert cache.lookup(SCOPE, LOGON.replace("4624", "4634")) is None
+
+
+def test_same_event_refills_volatile_values():
+    cache = ResultCacheHandler(max_entries=10)
+    assert cache.store(SCOPE, LOGON, RESPONSE)
+    hit = cache.lookup(SCOPE, LOGON.replace("1001", "1002"))
+    assert hit == '{"EventID": 4624, "Action": "logon", "RecordID": 1002}'
+
+
+if __name__ == "__main__":
+    for name, test in list(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(f"{name} ok")